@@ -0,0 +1,62 @@
+"""Cost of building requests against a session.
+
+Builds ``COUNT`` requests, both from a fresh builder each time (as when paging
+through a listing) and from one builder reused (as when retrying), comparing
+against rebuilding the session's params and headers on every call::
+
+    python -m benchmarks.bench_build
+"""
+
+import timeit
+from typing import Callable
+
+from littoral.auth.models import ApiSession
+from littoral.request import Request, RequestBuilder
+from littoral.testing import ApiSessionFactory
+
+COUNT = 100_000
+
+session = ApiSessionFactory().build()
+template = Request(
+    url="https://api.tidal.com/v1/albums/1/tracks",  # type: ignore
+    params={"limit": 100, "offset": 0},
+)
+
+
+def uncompiled_build(builder: RequestBuilder, session: ApiSession) -> Request:
+    """Build as before: serialise the session and merge on every call."""
+    return builder._request.model_copy(
+        update={
+            "params": session.session.model_dump(mode="json", by_alias=True)
+            | builder._request.params,
+            "headers": session.access_token.headers() | builder._request.headers,
+        }
+    )
+
+
+def fresh(build: Callable[[RequestBuilder, ApiSession], Request]) -> None:
+    for _ in range(COUNT):
+        build(RequestBuilder(bytes, template), session)
+
+
+def reused(build: Callable[[RequestBuilder, ApiSession], Request]) -> None:
+    builder = RequestBuilder(bytes, template)
+    for _ in range(COUNT):
+        build(builder, session)
+
+
+def seconds(fn: Callable[[], None]) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=3))
+
+
+def main() -> None:
+    print(f"building {COUNT} requests")  # noqa: T201
+    print(f"{'':8}{'before':>10}{'after':>10}")  # noqa: T201
+    for name, run in [("fresh", fresh), ("reused", reused)]:
+        before = seconds(lambda: run(uncompiled_build))
+        after = seconds(lambda: run(RequestBuilder.build))
+        print(f"{name:8}{before:>9.3f}s{after:>9.3f}s")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Cost of importing littoral, as paid by every CLI run or cold worker.
+
+Imports each module in a fresh interpreter under ``python -X importtime``,
+reporting the best of ``REPEAT`` runs, and then the cost of first use, when
+deferred models are built::
+
+    python -m benchmarks.bench_import
+"""
+
+import re
+import subprocess
+import sys
+import timeit
+
+REPEAT = 5
+
+MODULES = ["littoral.models", "littoral.auth.client_oauth2", "littoral.sync"]
+
+# Modules which should not be imported until needed.
+DEFERRED = ["pycountry", "structlog"]
+
+FIRST_USE = """
+from littoral.auth.models import Session
+Session(countryCode="GB", sessionId="1")
+"""
+
+
+def import_time(module: str) -> tuple[float, set[str]]:
+    """Cumulative import time of ``module`` in ms, and every module imported."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    imported = {}
+    for line in result.stderr.splitlines():
+        if match := re.match(r"import time:\s+\d+ \|\s+(\d+) \|\s+(\S+)", line):
+            imported[match[2].strip()] = int(match[1]) / 1000
+    return imported[module], set(imported)
+
+
+def first_use() -> float:
+    """Time to import and then validate a session, in ms."""
+    run = [sys.executable, "-c", FIRST_USE]
+    return (
+        min(timeit.repeat(lambda: subprocess.run(run, check=True), number=1, repeat=3))
+        * 1000
+    )
+
+
+def main() -> None:
+    print(f"{'':30}{'import':>10}  deferred imported")  # noqa: T201
+    for module in MODULES:
+        runs = [import_time(module) for _ in range(REPEAT)]
+        imported = runs[0][1]
+        eager = [name for name in DEFERRED if name in imported]
+        best = min(ms for ms, _ in runs)
+        print(f"{module:30}{best:>8.1f}ms  {', '.join(eager) or '-'}")  # noqa: T201
+    print(f"{'first use':30}{first_use():>8.1f}ms")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
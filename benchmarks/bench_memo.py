@@ -0,0 +1,57 @@
+"""Cost of parsing identical responses, with and without a ``ParseMemo``.
+
+Parses ``COUNT`` responses drawn from ``DISTINCT`` different albums (as when
+many workers fetch the same few albums), reporting the best time of three and
+the memory the parsed albums hold::
+
+    python -m benchmarks.bench_memo
+"""
+
+import timeit
+import tracemalloc
+from typing import Any
+
+from littoral.cache import ParseMemo
+from littoral.models import Album
+from littoral.testing import AlbumFactory
+
+COUNT = 20_000
+DISTINCT = 100
+
+albums = [
+    AlbumFactory().build().model_dump_json(by_alias=True).encode()
+    for _ in range(DISTINCT)
+]
+# Bodies as received: equal, but not the same objects.
+responses = [bytes(bytearray(albums[i % DISTINCT])) for i in range(COUNT)]
+
+
+def plain() -> list[Album]:
+    return [Album.model_validate_json(data) for data in responses]
+
+
+def memoised() -> list[Album]:
+    memo = ParseMemo()
+    return [memo.parse(Album.model_validate_json, data) for data in responses]
+
+
+def retained(run: Any) -> float:
+    """Memory held by the parsed albums, in MiB."""
+    tracemalloc.start()
+    parsed = run()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del parsed
+    return size / 2**20
+
+
+def main() -> None:
+    print(f"parsing {COUNT} responses of {DISTINCT} albums")  # noqa: T201
+    print(f"{'':10}{'time':>10}{'memory':>12}")  # noqa: T201
+    for name, run in [("plain", plain), ("memoised", memoised)]:
+        seconds = min(timeit.repeat(run, number=1, repeat=3))
+        print(f"{name:10}{seconds:>9.3f}s{retained(run):>8.1f} MiB")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
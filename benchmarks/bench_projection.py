@@ -0,0 +1,44 @@
+"""Cost of parsing albums into a projection with only the fields wanted.
+
+Parses a listing of ``COUNT`` albums (with the extra keys tidal sends) into
+``Album`` and into ``projection(Album, *FIELDS)``, reporting the best time of
+three and the memory the parsed listing holds::
+
+    python -m benchmarks.bench_projection
+"""
+
+import timeit
+import tracemalloc
+
+from pydantic import TypeAdapter
+
+from benchmarks.bench_lazy import COUNT, listing
+from littoral.models import Album
+from littoral.parsers import projection
+
+FIELDS = ("id", "title", "duration")
+
+
+def retained(adapter: TypeAdapter) -> float:
+    """Memory held by the parsed listing, in MiB."""
+    tracemalloc.start()
+    parsed = adapter.validate_json(listing)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del parsed
+    return size / 2**20
+
+
+def main() -> None:
+    print(f"parsing {COUNT} albums, keeping {', '.join(FIELDS)}")  # noqa: T201
+    print(f"{'':10}{'time':>10}{'memory':>12}")  # noqa: T201
+    for name, model in [("Album", Album), ("only", projection(Album, *FIELDS))]:
+        adapter = TypeAdapter(list[model])  # type: ignore[valid-type]
+        seconds = min(
+            timeit.repeat(lambda: adapter.validate_json(listing), number=1, repeat=3)
+        )
+        print(f"{name:10}{seconds:>9.3f}s{retained(adapter):>8.1f} MiB")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Cost of parsing into msgspec structs rather than pydantic models.
+
+Parses listings of ``COUNT`` fakes from ``littoral.testing`` with each model's
+pydantic parser and with ``StructDecoder``, reporting the best time of three
+and the memory the parsed listing holds::
+
+    python -m benchmarks.bench_structs
+"""
+
+import timeit
+import tracemalloc
+from typing import Any, Callable
+
+from polyfactory.factories.pydantic_factory import ModelFactory
+
+from littoral.models import Album, Artist
+from littoral.parsers import parser
+from littoral.structs import StructDecoder
+from littoral.testing import AlbumFactory, ArtistFactory
+
+COUNT = 20_000
+
+FIXTURES: list[tuple[Any, type[ModelFactory]]] = [
+    (Album, AlbumFactory),
+    (Artist, ArtistFactory),
+]
+
+
+def listing(factory: type[ModelFactory]) -> bytes:
+    fakes = [fake.model_dump_json(by_alias=True) for fake in factory.batch(100)]
+    return ("[" + ",".join(fakes * (COUNT // 100)) + "]").encode()
+
+
+def retained(parse: Callable[[bytes], Any], data: bytes) -> float:
+    """Memory held by the parsed listing, in MiB."""
+    tracemalloc.start()
+    parsed = parse(data)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del parsed
+    return size / 2**20
+
+
+def main() -> None:
+    decoder = StructDecoder()
+    print(f"parsing {COUNT} of each")  # noqa: T201
+    print(f"{'':22}{'time':>10}{'memory':>12}")  # noqa: T201
+    for model, factory in FIXTURES:
+        data = listing(factory)
+        pydantic = parser(list[model])
+        for name, parse in [
+            ("pydantic", pydantic),
+            ("structs", decoder.parser(pydantic)),
+        ]:
+            seconds = min(timeit.repeat(lambda: parse(data), number=1, repeat=3))
+            label = f"{model.__name__} {name}"
+            memory = retained(parse, data)
+            print(f"{label:22}{seconds:>9.3f}s{memory:>8.1f} MiB")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
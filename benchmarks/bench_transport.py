@@ -0,0 +1,86 @@
+"""Per-request overhead of littoral's transport objects.
+
+Compares the fast paths in :mod:`littoral.request` against the fully validated
+pydantic equivalents they replace::
+
+    python -m benchmarks.bench_transport
+"""
+
+import timeit
+from typing import Callable
+
+import httpx
+
+from littoral.request import Request, RequestBuilder, Response
+from littoral.testing import ApiSessionFactory
+
+NUMBER = 20_000
+
+session = ApiSessionFactory().build()
+template = Request(
+    url="https://api.tidal.com/v1/albums/1/tracks",  # type: ignore
+    params={"limit": 100, "offset": 0},
+)
+builder = RequestBuilder(bytes, template)
+request = builder.build(session)
+httpx_response = httpx.Response(
+    200,
+    headers={"content-type": "application/json", "etag": '"abc"'},
+    content=b"{}",
+    request=request.to_httpx(),
+)
+httpx_response.read()
+
+
+def validated_build() -> Request:
+    return template.model_copy(
+        update={
+            "params": session.params() | template.params,
+            "headers": session.headers() | template.headers,
+        }
+    )
+
+
+def validated_to_httpx() -> httpx.Request:
+    return httpx.Request(
+        method=request.method,
+        url=str(request.url),
+        params=request.params,
+        headers=request.headers,
+    )
+
+
+def validated_from_httpx() -> Response:
+    return Response(
+        status_code=httpx_response.status_code,
+        url=str(httpx_response.url),  # type: ignore
+        headers=httpx_response.headers,  # type: ignore
+        data=httpx_response.read(),
+    )
+
+
+CASES: list[tuple[str, Callable[[], object], Callable[[], object]]] = [
+    ("build", validated_build, lambda: builder.build(session)),
+    ("to_httpx", validated_to_httpx, request.to_httpx),
+    ("from_httpx", validated_from_httpx, lambda: Response.from_httpx(httpx_response)),
+]
+
+
+def per_call(fn: Callable[[], object]) -> float:
+    """Best of five runs, in microseconds per call."""
+    return min(timeit.repeat(fn, number=NUMBER, repeat=5)) / NUMBER * 1e6
+
+
+def main() -> None:
+    print(f"{'':12}{'before':>10}{'after':>10}")  # noqa: T201
+    total_before = total_after = 0.0
+    for name, before, after in CASES:
+        b, a = per_call(before), per_call(after)
+        total_before += b
+        total_after += a
+        print(f"{name:12}{b:>8.2f}us{a:>8.2f}us")  # noqa: T201
+    print(f"{'total':12}{total_before:>8.2f}us{total_after:>8.2f}us")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
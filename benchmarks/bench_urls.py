@@ -0,0 +1,58 @@
+"""Cost of storing the api's urls on every parsed resource.
+
+Parses a listing of ``COUNT`` albums, comparing against albums which each
+build and keep their own ``Urls`` (as before they were shared), reporting the
+best time of three and the memory the parsed listing holds::
+
+    python -m benchmarks.bench_urls
+"""
+
+import timeit
+import tracemalloc
+import warnings
+from typing import Any
+
+from pydantic import Field, TypeAdapter
+
+from littoral.config import Urls
+from littoral.models import Album
+from littoral.testing import AlbumFactory
+
+COUNT = 20_000
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")
+
+    class AlbumWithUrls(Album):
+        """An album as before: with its own urls, built as it is parsed."""
+
+        urls: Urls = Field(default_factory=Urls.default)  # type: ignore
+
+
+album = AlbumFactory().build().model_dump_json(by_alias=True).encode()
+listing = b"[" + b",".join([album] * COUNT) + b"]"
+
+
+def retained(adapter: TypeAdapter) -> tuple[float, Any]:
+    """Memory held by the parsed listing, in MiB."""
+    tracemalloc.start()
+    parsed = adapter.validate_json(listing)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / 2**20, parsed
+
+
+def main() -> None:
+    print(f"parsing {COUNT} albums")  # noqa: T201
+    print(f"{'':10}{'time':>10}{'memory':>12}")  # noqa: T201
+    for name, model in [("before", AlbumWithUrls), ("after", Album)]:
+        adapter = TypeAdapter(list[model])  # type: ignore
+        seconds = min(
+            timeit.repeat(lambda: adapter.validate_json(listing), number=1, repeat=3)
+        )
+        memory, _ = retained(adapter)
+        print(f"{name:10}{seconds:>9.3f}s{memory:>8.1f} MiB")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+from typing import Any
+
+__all__ = ["warm_up"]
+
+
+def __getattr__(name: str) -> Any:
+    # Imported lazily, so that importing littoral does not import pydantic.
+    if name == "warm_up":
+        from littoral.parsers import warm_up
+
+        return warm_up
+    raise AttributeError(name)
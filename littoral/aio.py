@@ -0,0 +1,637 @@
+"""An asyncio session: the twin of :mod:`littoral.sync`."""
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import timedelta
+from itertools import count, islice
+from pathlib import Path
+from time import monotonic
+from typing import AsyncIterator, Awaitable, BinaryIO, Callable, Iterable, TypeVar
+
+from httpx import AsyncClient, HTTPStatusError, TimeoutException, TransportError
+from httpx import Response as HttpxResponse
+from typing_extensions import Self
+
+import littoral.auth.client_oauth2 as oauth2
+from littoral.auth.models import AccessToken, ApiSession, ClientConfig, RefreshToken
+from littoral.auth.store import TokenStore
+from littoral.cache import MISSING, DiskCache, MemoryCache, ParseMemo, parsed_key
+from littoral.circuit import CircuitBreaker, CircuitOpen
+from littoral.deadline import Deadline, DeadlineExceeded
+from littoral.hedging import HedgingPolicy
+from littoral.log import get_logger
+from littoral.paging import Page, PageFactory
+from littoral.parsers import Decoder
+from littoral.ratelimit import RateLimiter, retry_after
+from littoral.request import (
+    Request,
+    RequestBuilder,
+    Response,
+    StatelessRequestBuilder,
+    T,
+)
+from littoral.retry import RetryPolicy
+from littoral.singleflight import AsyncSingleFlight
+from littoral.streaming import ItemsRequestBuilder
+
+logger = get_logger()
+
+R = TypeVar("R")
+
+
+@dataclass
+class HttpSession:
+    client: AsyncClient = field(default_factory=AsyncClient)
+    cache: MemoryCache | None = None
+    disk_cache: DiskCache | None = None
+    rate_limiter: RateLimiter | None = None
+    retry: RetryPolicy = field(default_factory=RetryPolicy)
+    single_flight: AsyncSingleFlight | None = None
+    hedging: HedgingPolicy | None = None
+    circuit_breaker: CircuitBreaker | None = None
+    decoder: Decoder | None = None
+    parse_memo: ParseMemo | None = None
+
+    async def send(
+        self,
+        request_builder: StatelessRequestBuilder[T],
+        deadline: Deadline | None = None,
+    ) -> T:
+        request = request_builder.build()
+        return await self.send_request(request, request_builder, deadline)
+
+    async def send_request(
+        self,
+        request: Request,
+        builder: RequestBuilder[T],
+        deadline: Deadline | None = None,
+    ) -> T:
+        if self.decoder is not None:
+            builder = builder.parsed_with(self.decoder.parser(builder.parser))
+        if self.cache is not None:
+            cached = self.cache.get(request, builder)
+            if cached is not MISSING:
+                return cached  # type: ignore
+
+        if self.single_flight is not None and request.method == "GET":
+            result = await self.single_flight.do(
+                parsed_key(request, builder),
+                lambda: self._send_request(request, builder, deadline),
+                timeout=None if deadline is None else deadline.remaining(),
+            )
+        else:
+            result = await self._send_request(request, builder, deadline)
+
+        if self.cache is not None:
+            self.cache.put(request, builder, result)
+        return result
+
+    async def _send_request(
+        self, request: Request, builder: RequestBuilder[T], deadline: Deadline | None
+    ) -> T:
+        return builder.parse(await self._fetch(request, deadline), self.parse_memo)
+
+    async def _fetch(self, request: Request, deadline: Deadline | None) -> Response:
+        # SQLite blocks, so is kept off the event loop.
+        stored = (
+            await asyncio.to_thread(self.disk_cache.get, request)
+            if self.disk_cache
+            else None
+        )
+        conditional = (
+            request if stored is None else DiskCache.conditional(request, stored)
+        )
+        try:
+            resp = await self._send_with_retries(conditional, deadline)
+        except CircuitOpen:
+            if stored is None:
+                raise
+            logger.info("Circuit open: serving stale response", request=request)
+            return stored
+        if resp.status_code == 304 and stored is not None:
+            return stored
+        resp.raise_for_status()
+        response = Response.from_httpx(resp)
+        if self.disk_cache is not None:
+            await asyncio.to_thread(self.disk_cache.put, request, response)
+        return response
+
+    async def download(
+        self, request: Request, file: BinaryIO, deadline: Deadline | None = None
+    ) -> int:
+        """Stream the body of the response to ``request`` into ``file``.
+
+        The body is written a chunk at a time as it arrives, so is never held in
+        memory whole: use this for images and other large downloads.  Responses
+        are not cached.  Returns the number of bytes written.
+        """
+        resp = await self._send_with_retries(request, deadline, stream=True)
+        try:
+            resp.raise_for_status()
+            written = 0
+            async for chunk in self._chunks(resp, deadline):
+                file.write(chunk)
+                written += len(chunk)
+            return written
+        finally:
+            await resp.aclose()
+
+    async def stream(
+        self,
+        request: Request,
+        builder: ItemsRequestBuilder[T],
+        deadline: Deadline | None = None,
+    ) -> AsyncIterator[T]:
+        """Yield the items of the response to ``request`` as they arrive.
+
+        Each item is parsed as soon as it has been downloaded, so the whole
+        response is never held in memory.  Responses are not cached.  The
+        ``deadline`` bounds getting the response, and each read is bounded by a
+        read timeout clipped to it, but the time the caller spends on items is
+        its own.
+        """
+        resp = await self._send_with_retries(request, deadline, stream=True)
+        try:
+            resp.raise_for_status()
+            parser = builder.items_parser
+            scanner = parser.scanner()
+            async for chunk in resp.aiter_bytes():
+                for item in scanner.feed(chunk):
+                    yield parser.item_parser(item)
+            scanner.close()
+        finally:
+            await resp.aclose()
+
+    @staticmethod
+    async def _chunks(
+        resp: HttpxResponse, deadline: Deadline | None
+    ) -> AsyncIterator[bytes]:
+        async for chunk in resp.aiter_bytes():
+            yield chunk
+            if deadline is not None:
+                deadline.check()
+
+    async def _send_with_retries(
+        self, request: Request, deadline: Deadline | None, stream: bool = False
+    ) -> HttpxResponse:
+        """Send ``request``, retrying failures as ``retry`` allows.
+
+        Returns the first successful (or not modified) response, which must be
+        closed if ``stream``ed; any other final response raises.
+        """
+        host = request.url.host or ""
+        self.retry.started()
+        for attempt in count():
+            if self.rate_limiter is not None:
+                await self._wait(self.rate_limiter.acquire(host), deadline)
+            if deadline is not None:
+                deadline.check()
+            logger.debug("Sending request", attempt=attempt, request=request)
+            try:
+                resp = await self._guarded_send(request, host, deadline, stream)
+            except TransportError as e:
+                if not self.retry.should_retry(request.method, attempt):
+                    raise
+                logger.info("Retrying after error", error=repr(e), request=request)
+                await self._wait(self.retry.backoff(attempt), deadline)
+                continue
+            status_code = resp.status_code
+            if self.rate_limiter is not None:
+                self.rate_limiter.record(host, status_code, resp.headers)
+            if 200 <= status_code <= 299 or status_code == 304:
+                return resp
+            await resp.aclose()
+            if status_code == 404:
+                raise KeyError
+            elif self.retry.should_retry(request.method, attempt, status_code):
+                delay = retry_after(resp.headers)
+                logger.info(
+                    "Retrying",
+                    status_code=status_code,
+                    retry_after=delay,
+                    request=request,
+                )
+                # A rate limiter will already make us wait before the next attempt.
+                if status_code != 429 or self.rate_limiter is None:
+                    await self._wait(
+                        self.retry.backoff(attempt) if delay is None else delay,
+                        deadline,
+                    )
+            else:
+                resp.raise_for_status()
+
+        assert False, "Unreachable"
+
+    @staticmethod
+    async def _wait(delay: float, deadline: Deadline | None) -> None:
+        if deadline is not None:
+            deadline.check_wait(delay)
+        await asyncio.sleep(delay)
+
+    async def _guarded_send(
+        self, request: Request, host: str, deadline: Deadline | None, stream: bool
+    ) -> HttpxResponse:
+        if self.circuit_breaker is None:
+            return await self._send(request, deadline, stream)
+        if not self.circuit_breaker.allow(host):
+            raise CircuitOpen(host)
+
+        start = monotonic()
+        try:
+            resp = await self._send(request, deadline, stream)
+        except TransportError:
+            self.circuit_breaker.record(host, False, monotonic() - start)
+            raise
+        except BaseException:
+            # The caller gave up (its deadline passed or it was cancelled), which
+            # says nothing about the host.
+            self.circuit_breaker.release(host)
+            raise
+        self.circuit_breaker.record(host, resp.status_code < 500, monotonic() - start)
+        return resp
+
+    async def _send(
+        self, request: Request, deadline: Deadline | None, stream: bool
+    ) -> HttpxResponse:
+        try:
+            return await self._hedged_send(request, deadline, stream)
+        except TimeoutException as e:
+            if deadline is not None and not deadline.remaining():
+                raise DeadlineExceeded from e
+            raise
+
+    async def _hedged_send(
+        self, request: Request, deadline: Deadline | None, stream: bool
+    ) -> HttpxResponse:
+        # Streams are downloads, too big to duplicate.
+        if self.hedging is None or request.method != "GET" or stream:
+            return (await self._timed_send(request, deadline, stream))[0]
+
+        tasks = {asyncio.create_task(self._timed_send(request, deadline))}
+        done, _ = await asyncio.wait(tasks, timeout=self.hedging.delay())
+        if not done and self.hedging.should_hedge():
+            logger.debug("Hedging request", request=request)
+            tasks.add(asyncio.create_task(self._timed_send(request, deadline)))
+
+        # Take the first answer and cancel the loser.
+        errors = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    resp, latency = await next_done
+                except Exception as e:
+                    errors.append(e)
+                else:
+                    self.hedging.record(latency)
+                    return resp
+        finally:
+            for task in tasks:
+                task.cancel()
+        raise errors[0]
+
+    async def _timed_send(
+        self, request: Request, deadline: Deadline | None, stream: bool = False
+    ) -> tuple[HttpxResponse, float]:
+        httpx_request = request.to_httpx()
+        if deadline is not None:
+            httpx_request.extensions["timeout"] = deadline.clip(
+                self.client.timeout.as_dict()
+            )
+        start = monotonic()
+        resp = await self.client.send(httpx_request, stream=stream)
+        return resp, monotonic() - start
+
+
+async def _started(items: AsyncIterator[T]) -> AsyncIterator[T]:
+    """Start ``items`` now, so that any error sending its request is raised now."""
+    try:
+        first = await anext(items)
+    except StopAsyncIteration:
+        return items
+
+    async def chained() -> AsyncIterator[T]:
+        yield first
+        async for item in items:
+            yield item
+
+    return chained()
+
+
+@dataclass
+class TokenManager:
+    """Keeps an api session's access token fresh.
+
+    Whilst running, a background task refreshes tokens ``refresh_margin`` before
+    they expire, so requests never wait for a refresh unless the token has
+    actually expired (say, because background refreshing failed).  Only one
+    refresh is ever in flight: concurrent callers wait on it, and the new token
+    is swapped into ``api_session`` in a single assignment.  Given a ``store``,
+    refreshes are also coordinated with other processes sharing it.
+    """
+
+    api_session: ApiSession
+    http_session: HttpSession
+    refresh_margin: timedelta = timedelta(minutes=5)
+    retry_interval: timedelta = timedelta(seconds=30)
+    store: TokenStore | None = None
+    _lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False, repr=False)
+    _task: asyncio.Task | None = field(default=None, init=False, repr=False)
+    # When the token last replaced may be refreshed, on the monotonic clock.
+    _not_before: float = field(default=0.0, init=False, repr=False)
+
+    async def current(self, deadline: Deadline | None = None) -> AccessToken:
+        """The current access token, refreshed first if it has expired."""
+        self._ensure_running()
+        access_token = self.api_session.access_token
+        if access_token.is_expired():
+            await self.refresh(access_token, deadline)
+        return self.api_session.access_token
+
+    async def refresh(
+        self, stale: AccessToken, deadline: Deadline | None = None
+    ) -> None:
+        """Replace ``stale`` with a new access token, unless already replaced."""
+        async with self._lock:
+            if self.api_session.access_token is not stale:
+                return
+            if self.store is None:
+                await self._fetch_new_token(deadline)
+                return
+
+            # Waiting for another process must not block the event loop, nor
+            # (if cancelled) leave a thread behind to take the lock later.
+            while not self.store.acquire(timeout=0):
+                if deadline is not None:
+                    deadline.check_wait(self.store.poll_interval)
+                await asyncio.sleep(self.store.poll_interval)
+            try:
+                stored = self.store.fresher_token(stale, self.refresh_margin)
+                if stored is not None:
+                    logger.debug("Using access token refreshed by another process")
+                    self.api_session.refresh_token = stored.refresh_token
+                    self.api_session.access_token = stored.access_token
+                    self._replaced()
+                else:
+                    await self._fetch_new_token(deadline)
+                    self.store.save(self.api_session)
+            finally:
+                self.store.release()
+
+    def _replaced(self) -> None:
+        # Tokens which don't outlast the margin are still kept a while, rather
+        # than refreshed again straight away.
+        self._not_before = monotonic() + self.retry_interval.total_seconds()
+
+    async def _fetch_new_token(self, deadline: Deadline | None) -> None:
+        logger.debug("Refreshing access token")
+        access_token = await self.http_session.send(
+            self.api_session.new_access_token(), deadline
+        )
+        self.api_session.access_token = access_token
+        self._replaced()
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_in_background())
+
+    async def _refresh_in_background(self) -> None:
+        while True:
+            access_token = self.api_session.access_token
+            delay = max(
+                access_token.refresh_in(self.refresh_margin).total_seconds(),
+                self._not_before - monotonic(),
+            )
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            try:
+                await self.refresh(access_token)
+            except Exception:
+                logger.exception("Background token refresh failed")
+                await asyncio.sleep(self.retry_interval.total_seconds())
+
+
+@dataclass
+class Session:
+    api_session: ApiSession
+    http_session: HttpSession
+    refresh_margin: timedelta = timedelta(minutes=5)
+    token_store: TokenStore | None = None
+    timeout: float | None = None
+    _tokens: TokenManager = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._tokens = TokenManager(
+            self.api_session,
+            self.http_session,
+            self.refresh_margin,
+            store=self.token_store,
+        )
+
+    @classmethod
+    async def login_oauth_simple(
+        cls, client_config: ClientConfig | None = None
+    ) -> Self:
+        if client_config is None:
+            client_config = oauth2.default_client_config()
+        http_session = HttpSession()
+        flow = await http_session.send(oauth2.auth_request(client_config))
+        print(  # noqa: T201
+            f"Visit {flow.verification_url} to log in.  "
+            "Link expires at {flow.expires_at}."
+        )
+        await asyncio.to_thread(input, "Press enter when approved")
+        user_auth = await http_session.send(flow.user(client_config))
+        session = await http_session.send(user_auth.session())
+        api_session = ApiSession(
+            session=session,
+            refresh_token=RefreshToken.model_validate(user_auth.model_dump()),
+            access_token=AccessToken.model_validate(
+                user_auth.model_dump(by_alias=True)
+            ),
+            client_config=client_config,
+        )
+
+        return cls(
+            api_session=api_session,
+            http_session=http_session,
+        )
+
+    @classmethod
+    async def from_api_session(
+        cls, api_session: ApiSession, token_store: TokenStore | None = None
+    ) -> Self:
+        http_session = HttpSession()
+        session = cls(api_session, http_session, token_store=token_store)
+        await session._tokens.current()
+
+        return session
+
+    def dump_to_file(self, file: Path) -> None:
+        TokenStore(file).save(self.api_session)
+
+    @classmethod
+    async def from_file(cls, file: Path) -> Self:
+        """Load a session from ``file``, sharing its tokens with other processes.
+
+        Refreshed tokens are written back to ``file``, and tokens refreshed by
+        other processes are picked up from it.
+        """
+        store = TokenStore(file)
+        return await cls.from_api_session(store.load(), store)
+
+    async def send(
+        self, request_builder: RequestBuilder[T], timeout: float | None = None
+    ) -> T:
+        """Send a request, handling authentication.
+
+        ``timeout`` (default: the session's ``timeout``) bounds the whole call,
+        including any token refreshes and retries, raising ``DeadlineExceeded``
+        if it cannot complete in time.
+        """
+        return await self._authenticated(
+            request_builder,
+            timeout,
+            lambda request, deadline: self.http_session.send_request(
+                request, request_builder, deadline
+            ),
+        )
+
+    async def download(
+        self,
+        request_builder: RequestBuilder,
+        file: BinaryIO,
+        timeout: float | None = None,
+    ) -> int:
+        """Stream a response's body into ``file``, handling authentication.
+
+        See ``HttpSession.download``.
+        """
+        return await self._authenticated(
+            request_builder,
+            timeout,
+            lambda request, deadline: self.http_session.download(
+                request, file, deadline
+            ),
+        )
+
+    async def stream(
+        self, request_builder: ItemsRequestBuilder[T], timeout: float | None = None
+    ) -> AsyncIterator[T]:
+        """Send a request, yielding the items of its response as they arrive.
+
+        See ``HttpSession.stream``.  ``timeout`` bounds the wait for the first
+        item; after that it only bounds each read.
+        """
+        items = await self._authenticated(
+            request_builder,
+            timeout,
+            lambda request, deadline: _started(
+                self.http_session.stream(request, request_builder, deadline)
+            ),
+        )
+        async for item in items:
+            yield item
+
+    async def _authenticated(
+        self,
+        request_builder: RequestBuilder,
+        timeout: float | None,
+        send: Callable[[Request, Deadline | None], Awaitable[R]],
+    ) -> R:
+        timeout = self.timeout if timeout is None else timeout
+        if timeout is None:
+            return await self._send_authenticated(request_builder, None, send)
+        deadline = Deadline.after(timeout)
+        try:
+            async with asyncio.timeout(timeout):
+                return await self._send_authenticated(request_builder, deadline, send)
+        except DeadlineExceeded:
+            raise
+        except TimeoutError as e:
+            raise DeadlineExceeded from e
+
+    async def _send_authenticated(
+        self,
+        request_builder: RequestBuilder,
+        deadline: Deadline | None,
+        send: Callable[[Request, Deadline | None], Awaitable[R]],
+    ) -> R:
+        access_token = await self._tokens.current(deadline)
+        try:
+            return await send(request_builder.build(self.api_session), deadline)
+        except HTTPStatusError as e:
+            if e.response.status_code == 401:
+                await self._tokens.refresh(access_token, deadline)
+                return await send(request_builder.build(self.api_session), deadline)
+            else:
+                raise
+
+    async def close(self) -> None:
+        self._tokens.stop()
+        await self.http_session.client.aclose()
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        await self.close()
+
+    async def send_many(
+        self, request_builders: Iterable[RequestBuilder[T]], max_concurrency: int = 10
+    ) -> list[T]:
+        """Send many requests concurrently, returning results in order.
+
+        At most ``max_concurrency`` requests are in flight at any one time.
+        """
+        if max_concurrency < 1:
+            raise ValueError(
+                f"max_concurrency must be at least 1, not {max_concurrency}"
+            )
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def send(request_builder: RequestBuilder[T]) -> T:
+            async with semaphore:
+                return await self.send(request_builder)
+
+        return list(await asyncio.gather(*(send(rb) for rb in request_builders)))
+
+    async def paginate(
+        self, pages: PageFactory[T], page_size: int = 100, max_concurrency: int = 1
+    ) -> AsyncIterator[T]:
+        """Walk every page of a listing, yielding items one at a time and in order.
+
+        Once the first page reveals the total, the remaining pages are fetched in
+        the background, ``max_concurrency`` at a time, whilst earlier pages are
+        consumed.  At most ``max_concurrency + 1`` pages are held in memory.
+        """
+        if max_concurrency < 1:
+            raise ValueError(
+                f"max_concurrency must be at least 1, not {max_concurrency}"
+            )
+        page = await self.send(pages(page_size, 0))
+        offsets = iter(page.remaining_offsets())
+        window: deque[asyncio.Task[Page[T]]] = deque(
+            asyncio.create_task(self.send(pages(page.limit, offset)))
+            for offset in islice(offsets, max_concurrency)
+        )
+        try:
+            while True:
+                for item in page.items:
+                    yield item
+                if not window:
+                    return
+                page = await window.popleft()
+                for offset in islice(offsets, 1):
+                    window.append(
+                        asyncio.create_task(self.send(pages(page.limit, offset)))
+                    )
+        finally:
+            for task in window:
+                task.cancel()
@@ -1,11 +1,13 @@
 from base64 import b64decode
 from datetime import timedelta
+from functools import cache
+from typing import Any
 
-from pydantic import AnyUrl, BaseModel, Field, field_validator
+from pydantic import AnyUrl, BaseModel, ConfigDict, Field, field_validator
 
 from littoral.auth.models import ClientConfig, ExpiryTime, Session
 from littoral.base import CamelModel
-from littoral.config import URLS
+from littoral.config import current_urls
 from littoral.models import User
 from littoral.request import Request, StatelessRequestBuilder
 
@@ -40,9 +42,18 @@ def default_client_id():
     ).decode()
 
 
-android_client_config = ClientConfig(
-    client_id=default_client_id(), client_secret=default_client_secret()
-)
+@cache
+def default_client_config() -> ClientConfig:
+    """The android client's config, decoded on first use rather than at import."""
+    return ClientConfig(
+        client_id=default_client_id(), client_secret=default_client_secret()
+    )
+
+
+def __getattr__(name: str) -> Any:
+    if name == "android_client_config":
+        return default_client_config()
+    raise AttributeError(name)
 
 
 class SimpleOauthFlow(CamelModel):
@@ -69,7 +80,7 @@ class SimpleOauthFlow(CamelModel):
                     "device_code": self.device_code,
                     "grant_type": "urn:ietf:params:oauth:grant-type:device_code",
                 },
-                url="https://auth.tidal.com/v1/oauth2/token",
+                url=current_urls().oauth2,
             ),
         )
 
@@ -79,7 +90,7 @@ def auth_request(client: ClientConfig) -> StatelessRequestBuilder[SimpleOauthFlo
         model=SimpleOauthFlow,
         request=Request(
             method="POST",
-            url="https://auth.tidal.com/v1/oauth2/device_authorization",
+            url=current_urls().device_authorization,
             data={
                 "client_id": client.client_id,
                 "scope": client.scope,
@@ -89,6 +100,8 @@ def auth_request(client: ClientConfig) -> StatelessRequestBuilder[SimpleOauthFlo
 
 
 class AuthenticatedUser(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     user: User
     token_type: str
     scope: str
@@ -102,7 +115,7 @@ class AuthenticatedUser(BaseModel):
             model=Session,
             request=Request(
                 method="GET",
-                url=f"{URLS.api_v1}/sessions",
+                url=f"{current_urls().api_v1}/sessions",
                 headers={"Authorization": f"Bearer {self.access_token}"},
             ),
         )
@@ -1,11 +1,19 @@
 from datetime import datetime, timedelta, timezone
-from typing import Annotated
-
-from pydantic import AwareDatetime, BaseModel, BeforeValidator, Field
-from pydantic_extra_types.country import CountryAlpha2
+from functools import lru_cache
+from typing import Annotated, Mapping
+
+from pydantic import (
+    AfterValidator,
+    AwareDatetime,
+    BaseModel,
+    BeforeValidator,
+    ConfigDict,
+    Field,
+)
 
 from littoral.base import CamelModel
-from littoral.config import URLS
+from littoral.config import current_urls
+from littoral.parsers import adapter
 from littoral.request import Request, StatelessRequestBuilder
 
 # local alias so we can mock datetime
@@ -24,26 +32,55 @@ def to_absolute(v: float | str | datetime) -> datetime | str:
 ExpiryTime = Annotated[AwareDatetime, BeforeValidator(to_absolute)]
 
 
+def to_country(v: str) -> str:
+    """Validate an ISO 3166 alpha-2 country code.
+
+    pycountry's database is slow to load, so is only imported when a session
+    is first validated, rather than with littoral.
+    """
+    from pydantic_extra_types.country import CountryAlpha2
+
+    return adapter(CountryAlpha2).validate_python(v)
+
+
+CountryCode = Annotated[str, AfterValidator(to_country)]
+
+
 class ClientConfig(CamelModel):
     client_id: str
     client_secret: str
     scope: str = "r_usr w_usr w_sub"
 
 
+# Keyed on values rather than the token, so that headers follow a token changed
+# in place.  Tokens are not frozen: a parse memo would keep their expiry.
+@lru_cache(maxsize=16)
+def _authorization(token_type: str, access_token: str) -> dict[str, str]:
+    return {"authorization": f"{token_type} {access_token}"}
+
+
 class AccessToken(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     access_token: str
     expires_at: ExpiryTime = Field(alias="expires_in")
     token_type: str
     scope: str
 
     def headers(self) -> dict[str, str]:
-        return {"authorization": f"{self.token_type} {self.access_token}"}
+        return dict(_authorization(self.token_type, self.access_token))
 
     def is_expired(self) -> bool:
         return datetime.now(timezone.utc) >= self.expires_at
 
+    def refresh_in(self, margin: timedelta) -> timedelta:
+        """How long until this token should be refreshed, ``margin`` before expiry."""
+        return self.expires_at - margin - datetime.now(timezone.utc)
+
 
 class RefreshToken(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     refresh_token: str
 
     def access_token(
@@ -53,7 +90,7 @@ class RefreshToken(BaseModel):
             model=AccessToken,
             request=Request(
                 method="POST",
-                url=URLS.oauth2,
+                url=current_urls().oauth2,
                 data={
                     "grant_type": "refresh_token",
                     "refresh_token": self.refresh_token,
@@ -67,23 +104,49 @@ class RefreshToken(BaseModel):
 class Session(CamelModel):
     """A session on the api, as sent with every request."""
 
-    country: CountryAlpha2 = Field(alias="countryCode")
+    model_config = ConfigDict(frozen=True)
+
+    country: CountryCode = Field(alias="countryCode")
     id: str = Field(alias="sessionId")
 
 
+# Sessions are frozen, so equal ones can share their params.
+@lru_cache(maxsize=16)
+def _params(session: Session) -> dict[str, str]:
+    return session.model_dump(mode="json", by_alias=True)
+
+
 class ApiSession(BaseModel):
     """All the state involved in maintaining a session with the api."""
 
+    model_config = ConfigDict(defer_build=True)
+
     session: Session
     refresh_token: RefreshToken
     access_token: AccessToken
     client_config: ClientConfig
 
     def params(self) -> dict[str, str]:
-        return self.session.model_dump(mode="json", by_alias=True)
+        return dict(self.shared_params())
 
     def headers(self) -> dict[str, str]:
-        return self.access_token.headers()
+        return dict(self.shared_headers())
+
+    def shared_params(self) -> Mapping[str, str]:
+        """The params sent with every request, computed once per session.
+
+        Shared between callers, so must not be mutated.
+        """
+        return _params(self.session)
+
+    def shared_headers(self) -> Mapping[str, str]:
+        """The headers sent with every request, computed once per access token.
+
+        Shared between callers, so must not be mutated.
+        """
+        return _authorization(
+            self.access_token.token_type, self.access_token.access_token
+        )
 
     def new_access_token(self) -> StatelessRequestBuilder[AccessToken]:
         return self.refresh_token.access_token(self.client_config)
@@ -0,0 +1,98 @@
+"""Sharing an api session, and so its tokens, between processes through a file."""
+
+import fcntl
+import os
+from dataclasses import dataclass, field
+from datetime import timedelta
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from time import monotonic, sleep
+from typing import IO
+
+from littoral.auth.models import AccessToken, ApiSession
+
+
+@dataclass
+class TokenStore:
+    """An api session stored as json in a file which many processes share.
+
+    Writes are atomic: the file is replaced, never partially written.  Holding the
+    store (``with store: ...``) takes an exclusive advisory lock on a sibling
+    ``.lock`` file, so one process can refresh the access token whilst the others
+    wait and then pick up the new token from the file rather than refreshing it
+    themselves.  Locking relies on ``fcntl`` and so is POSIX only.
+
+    Waiting for the lock with a timeout polls it every ``poll_interval`` seconds.
+    """
+
+    path: Path
+    poll_interval: float = 0.05
+    _lock_file: IO | None = field(default=None, init=False, repr=False)
+
+    @property
+    def lock_path(self) -> Path:
+        return self.path.with_name(f"{self.path.name}.lock")
+
+    def load(self) -> ApiSession:
+        return ApiSession.model_validate_json(self.path.read_bytes())
+
+    def save(self, api_session: ApiSession) -> None:
+        with NamedTemporaryFile(
+            "w", dir=self.path.parent, prefix=f".{self.path.name}.", delete=False
+        ) as f:
+            f.write(api_session.model_dump_json(by_alias=True))
+        os.replace(f.name, self.path)
+
+    def fresher_token(self, stale: AccessToken, margin: timedelta) -> ApiSession | None:
+        """The stored session, if another process has already replaced ``stale``.
+
+        The stored token must not itself be due for refresh within ``margin``.
+        """
+        if not self.path.exists():
+            return None
+        stored = self.load()
+        token = stored.access_token
+        if token.access_token == stale.access_token or token.refresh_in(margin) <= (
+            timedelta(0)
+        ):
+            return None
+        return stored
+
+    def acquire(self, timeout: float | None = None) -> bool:
+        """Take the lock, waiting at most ``timeout`` seconds (or for ever).
+
+        Returns whether the lock was taken: with a timeout, a holder which never
+        lets go is given up on, and the lock is never taken late.
+        """
+        lock_file = open(self.lock_path, "a")
+        if timeout is None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            self._lock_file = lock_file
+            return True
+
+        expires = monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                remaining = expires - monotonic()
+                if remaining <= 0:
+                    lock_file.close()
+                    return False
+                sleep(min(self.poll_interval, remaining))
+            else:
+                self._lock_file = lock_file
+                return True
+
+    def release(self) -> None:
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+
+    def __enter__(self) -> "TokenStore":
+        self.acquire()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.release()
@@ -0,0 +1,274 @@
+"""Caching parsed responses in memory and raw responses on disk."""
+
+import json
+import sqlite3
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import timedelta
+from hashlib import blake2b
+from pathlib import Path
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Final, Hashable
+
+from pydantic import BaseModel
+
+from littoral.parsers import parsed_type
+from littoral.request import Request, RequestBuilder, Response, T
+
+# Parts of a request which identify the caller rather than the resource.
+UNCACHED_PARAMS = frozenset({"sessionId"})
+UNCACHED_HEADERS = frozenset({"authorization"})
+
+
+class _Missing:
+    def __repr__(self) -> str:
+        return "MISSING"
+
+
+MISSING: Final = _Missing()
+
+
+def cache_key(request: Request) -> Hashable:
+    """A canonical, hashable form of a request which excludes credentials."""
+    return (
+        request.method,
+        str(request.url),
+        tuple(
+            sorted(
+                (k, str(v))
+                for k, v in request.params.items()
+                if k not in UNCACHED_PARAMS
+            )
+        ),
+        tuple(
+            sorted(
+                (k.lower(), v)
+                for k, v in request.headers.items()
+                if k.lower() not in UNCACHED_HEADERS
+            )
+        ),
+    )
+
+
+def parsed_key(request: Request, builder: RequestBuilder[T]) -> Hashable:
+    """Identify the result of parsing the response to a request.
+
+    The same request parsed differently is a different result.
+    """
+    return builder.parser, cache_key(request)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass
+class MemoryCache:
+    """A size-bounded LRU cache of parsed responses to GET requests.
+
+    Entries expire after a TTL, which can be set per endpoint by mapping url
+    prefixes to TTLs in ``ttls``; the longest matching prefix wins, and a zero TTL
+    disables caching.  Cached results are shared between callers, so should not be
+    mutated.
+    """
+
+    max_entries: int = 1024
+    default_ttl: timedelta = timedelta(minutes=5)
+    ttls: dict[str, timedelta] = field(default_factory=dict)
+    clock: Callable[[], float] = monotonic
+    stats: CacheStats = field(default_factory=CacheStats, init=False)
+    _entries: OrderedDict[Hashable, tuple[float, Any]] = field(
+        default_factory=OrderedDict, init=False, repr=False
+    )
+    _lock: Lock = field(default_factory=Lock, init=False, repr=False)
+
+    def ttl(self, request: Request) -> timedelta:
+        url = str(request.url)
+        prefixes = [prefix for prefix in self.ttls if url.startswith(prefix)]
+        return self.ttls[max(prefixes, key=len)] if prefixes else self.default_ttl
+
+    def _key(self, request: Request, builder: RequestBuilder[T]) -> Hashable | None:
+        if request.method != "GET" or not self.ttl(request):
+            return None
+        return parsed_key(request, builder)
+
+    def get(self, request: Request, builder: RequestBuilder[T]) -> T | _Missing:
+        """Look up the parsed response to a request, or return ``MISSING``."""
+        key = self._key(request, builder)
+        if key is None:
+            return MISSING
+
+        with self._lock:
+            expires, value = self._entries.get(key, (0.0, MISSING))
+            if expires <= self.clock():
+                self._entries.pop(key, None)
+                self.stats.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def put(self, request: Request, builder: RequestBuilder[T], value: T) -> None:
+        key = self._key(request, builder)
+        if key is None:
+            return
+
+        expires = self.clock() + self.ttl(request).total_seconds()
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _is_frozen(type_: Any) -> bool:
+    return (
+        isinstance(type_, type)
+        and issubclass(type_, BaseModel)
+        and bool(type_.model_config.get("frozen"))
+    )
+
+
+@dataclass
+class ParseMemo:
+    """A size-bounded LRU of parsed responses, by their content.
+
+    Identical responses (the same album fetched by many workers, say) parsed
+    the same way are only validated once: later ones get the same result, so
+    the memory is shared too.  Bodies are keyed by a hash, not kept.
+
+    Only frozen models (resources, and projections of them) are memoised, as
+    only they can be shared safely; anything else, including tokens whose
+    expiry is relative to when they were parsed, is parsed afresh every time.
+    """
+
+    max_entries: int = 1024
+    stats: CacheStats = field(default_factory=CacheStats, init=False)
+    _entries: OrderedDict[Hashable, Any] = field(
+        default_factory=OrderedDict, init=False, repr=False
+    )
+    _lock: Lock = field(default_factory=Lock, init=False, repr=False)
+
+    def parse(self, parser: Callable[[bytes], T], data: bytes) -> T:
+        """Parse ``data`` with ``parser``, unless it has been already."""
+        if not _is_frozen(parsed_type(parser)):
+            return parser(data)
+        key = parser, blake2b(data, digest_size=16).digest()
+        with self._lock:
+            value = self._entries.get(key, MISSING)
+            if value is not MISSING:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return value
+            self.stats.misses += 1
+
+        value = parser(data)
+        with self._lock:
+            # Parsed concurrently elsewhere: share the first result.
+            value = self._entries.setdefault(key, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@dataclass
+class DiskCache:
+    """A persistent cache of raw responses to GET requests, stored in SQLite.
+
+    Only responses carrying a validator (``ETag`` or ``Last-Modified``) are
+    stored.  Rather than being served blindly, stored responses are revalidated
+    with a conditional request: a ``304 Not Modified`` re-uses the stored body
+    without downloading it again.
+    """
+
+    path: Path
+    _db: sqlite3.Connection = field(init=False, repr=False)
+    _lock: Lock = field(default_factory=Lock, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, status_code INTEGER, url TEXT, "
+                "headers TEXT, data BLOB)"
+            )
+
+    @staticmethod
+    def _key(request: Request) -> str:
+        return json.dumps(cache_key(request))
+
+    def get(self, request: Request) -> Response | None:
+        if request.method != "GET":
+            return None
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status_code, url, headers, data FROM responses WHERE key = ?",
+                (self._key(request),),
+            ).fetchone()
+        if row is None:
+            return None
+
+        status_code, url, headers, data = row
+        return Response(
+            status_code=status_code, url=url, headers=json.loads(headers), data=data
+        )
+
+    def put(self, request: Request, response: Response) -> None:
+        headers = {k.lower(): v for k, v in response.headers.items()}
+        if request.method != "GET" or not (
+            "etag" in headers or "last-modified" in headers
+        ):
+            return
+
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (
+                    self._key(request),
+                    response.status_code,
+                    str(response.url),
+                    json.dumps(headers),
+                    response.data,
+                ),
+            )
+
+    @staticmethod
+    def conditional(request: Request, stored: Response) -> Request:
+        """Make ``request`` conditional on ``stored`` having changed."""
+        conditions = {}
+        if etag := stored.headers.get("etag"):
+            conditions["If-None-Match"] = etag
+        if last_modified := stored.headers.get("last-modified"):
+            conditions["If-Modified-Since"] = last_modified
+        return request.model_copy(update={"headers": request.headers | conditions})
+
+    def close(self) -> None:
+        self._db.close()
@@ -0,0 +1,131 @@
+"""Per-host circuit breaking.
+
+Like the rate limiter, nothing here does IO: the breaker says whether a request
+may be sent, and the sessions tell it how requests went.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from threading import Lock
+from time import monotonic
+from typing import Callable
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+
+class CircuitOpen(Exception):
+    """A request was refused because its host's circuit is open."""
+
+
+@dataclass
+class Circuit:
+    """The recent history of requests to one host."""
+
+    window: int
+    state: CircuitState = CircuitState.CLOSED
+    outcomes: deque[bool] = field(default_factory=deque)
+    opened_at: float = 0.0
+    probes: int = 0
+
+    def __post_init__(self) -> None:
+        self.outcomes = deque(self.outcomes, maxlen=self.window)
+
+    def open(self, now: float) -> None:
+        self.state = CircuitState.OPEN
+        self.opened_at = now
+        self.outcomes.clear()
+
+    def close(self) -> None:
+        self.state = CircuitState.CLOSED
+        self.outcomes.clear()
+
+
+@dataclass
+class CircuitBreaker:
+    """A circuit breaker per host, so one degraded host cannot drag down the rest.
+
+    Whilst a host's circuit is closed, the outcomes of the last ``window``
+    requests to it are remembered; once at least ``min_requests`` are known and
+    ``failure_ratio`` of them failed (or, given ``slow_call``, took at least that
+    many seconds) the circuit opens.  Requests to an open circuit are refused
+    outright for ``reset_timeout`` seconds, after which the circuit is half-open:
+    up to ``probes`` trial requests are let through, and the first to succeed
+    closes the circuit again whilst the first to fail re-opens it.
+    """
+
+    failure_ratio: float = 0.5
+    min_requests: int = 10
+    window: int = 50
+    slow_call: float | None = None
+    reset_timeout: float = 30.0
+    probes: int = 1
+    clock: Callable[[], float] = monotonic
+    _circuits: dict[str, Circuit] = field(default_factory=dict, init=False)
+    _lock: Lock = field(default_factory=Lock, init=False, repr=False)
+
+    def _circuit(self, host: str) -> Circuit:
+        circuit = self._circuits.get(host)
+        if circuit is None:
+            circuit = self._circuits[host] = Circuit(self.window)
+        return circuit
+
+    def state(self, host: str) -> CircuitState:
+        with self._lock:
+            return self._circuit(host).state
+
+    def allow(self, host: str) -> bool:
+        """Whether a request to ``host`` may be sent now.
+
+        Every allowed request must be followed by a call to ``record``, or to
+        ``release`` if it was abandoned before the host answered.
+        """
+        with self._lock:
+            circuit = self._circuit(host)
+            if circuit.state is CircuitState.OPEN:
+                if self.clock() - circuit.opened_at < self.reset_timeout:
+                    return False
+                circuit.state = CircuitState.HALF_OPEN
+                circuit.probes = 0
+            if circuit.state is CircuitState.HALF_OPEN:
+                if circuit.probes >= self.probes:
+                    return False
+                circuit.probes += 1
+            return True
+
+    def release(self, host: str) -> None:
+        """Forget an allowed request to ``host`` which was abandoned by its caller.
+
+        Nothing is learnt about the host, but a half-open circuit's probe is
+        handed back so another request may try.
+        """
+        with self._lock:
+            circuit = self._circuit(host)
+            if circuit.state is CircuitState.HALF_OPEN and circuit.probes:
+                circuit.probes -= 1
+
+    def record(self, host: str, success: bool, latency: float = 0.0) -> None:
+        """Record how an allowed request to ``host`` went."""
+        failed = not success or (
+            self.slow_call is not None and latency >= self.slow_call
+        )
+        with self._lock:
+            circuit = self._circuit(host)
+            if circuit.state is CircuitState.HALF_OPEN:
+                if failed:
+                    circuit.open(self.clock())
+                else:
+                    circuit.close()
+            elif circuit.state is CircuitState.CLOSED:
+                circuit.outcomes.append(failed)
+                failures = sum(circuit.outcomes)
+                if len(
+                    circuit.outcomes
+                ) >= self.min_requests and failures >= self.failure_ratio * len(
+                    circuit.outcomes
+                ):
+                    circuit.open(self.clock())
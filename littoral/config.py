@@ -1,12 +1,20 @@
-from typing import Self
+"""The api's endpoints, shared by every request rather than stored on models."""
 
-from pydantic import AnyHttpUrl, BaseModel
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import cache
+from typing import Any, Iterator, Self
+
+from pydantic import AnyHttpUrl, BaseModel, ConfigDict
 
 
 class Urls(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     api_v1: AnyHttpUrl
     api_v2: AnyHttpUrl
     oauth2: AnyHttpUrl
+    device_authorization: AnyHttpUrl
     image: AnyHttpUrl
     video: AnyHttpUrl
 
@@ -16,9 +24,38 @@ class Urls(BaseModel):
             api_v1="https://api.tidal.com/v1",  # type: ignore
             api_v2="https://api.tidal.com/v2",  # type: ignore
             oauth2="https://auth.tidal.com/v1/oauth2/token",  # type: ignore
+            device_authorization=(
+                "https://auth.tidal.com/v1/oauth2/device_authorization"  # type: ignore
+            ),
             image="https://resources.tidal.com/images",  # type: ignore
             video="https://resources.tidal.com/videos",  # type: ignore
         )
 
 
-URLS = Urls.default()
+_urls: ContextVar[Urls | None] = ContextVar("urls", default=None)
+
+
+@cache
+def _default_urls() -> Urls:
+    return Urls.default()
+
+
+def current_urls() -> Urls:
+    """The urls requests are built against: the default unless overridden."""
+    return _urls.get() or _default_urls()
+
+
+@contextmanager
+def use_urls(urls: Urls) -> Iterator[Urls]:
+    """Build requests against ``urls`` within the block, e.g. to test."""
+    token = _urls.set(urls)
+    try:
+        yield urls
+    finally:
+        _urls.reset(token)
+
+
+def __getattr__(name: str) -> Any:
+    if name == "URLS":
+        return current_urls()
+    raise AttributeError(name)
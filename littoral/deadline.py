@@ -0,0 +1,49 @@
+"""Deadlines: an upper bound on how long a whole call may take."""
+
+from dataclasses import dataclass
+from time import monotonic
+from typing import Mapping, Self
+
+
+class DeadlineExceeded(TimeoutError):
+    """A call could not complete before its deadline."""
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """A point in (monotonic) time by which a call must have finished.
+
+    The same deadline is handed to every step of a call (token refreshes, each
+    attempt and the waits between them), so the call as a whole is bounded no
+    matter how many steps it takes.
+    """
+
+    expires: float
+
+    @classmethod
+    def after(cls, seconds: float) -> Self:
+        return cls(monotonic() + seconds)
+
+    def remaining(self) -> float:
+        return max(self.expires - monotonic(), 0.0)
+
+    def check(self) -> None:
+        """Raise if the deadline has passed."""
+        if not self.remaining():
+            raise DeadlineExceeded
+
+    def check_wait(self, delay: float) -> None:
+        """Raise if waiting ``delay`` seconds would leave no time to do anything.
+
+        There is no point sleeping before a retry which cannot finish in time.
+        """
+        if delay >= self.remaining():
+            raise DeadlineExceeded
+
+    def clip(self, timeouts: Mapping[str, float | None]) -> dict[str, float]:
+        """Cap each of a set of (connect, read, ...) timeouts at the time left."""
+        remaining = self.remaining()
+        return {
+            k: remaining if v is None else min(v, remaining)
+            for k, v in timeouts.items()
+        }
@@ -0,0 +1,59 @@
+"""Deciding when to hedge slow requests with a duplicate."""
+
+from collections import deque
+from dataclasses import dataclass, field
+from threading import Lock
+
+
+@dataclass
+class HedgingPolicy:
+    """When to send a duplicate of a slow idempotent request.
+
+    A request which has not answered within the ``percentile`` latency of recent
+    requests is hedged: a duplicate is sent and whichever answers first wins.
+    Until ``min_samples`` latencies have been seen, ``initial_delay`` is used
+    instead.  At most ``budget`` (a fraction) of requests are ever hedged, so
+    hedging cannot amplify load much even when everything is slow.
+    """
+
+    percentile: float = 0.95
+    budget: float = 0.05
+    initial_delay: float = 1.0
+    min_delay: float = 0.01
+    min_samples: int = 20
+    window: int = 1000
+    requests: int = field(default=0, init=False)
+    hedges: int = field(default=0, init=False)
+    _latencies: deque[float] = field(init=False, repr=False)
+    _lock: Lock = field(default_factory=Lock, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._latencies = deque(maxlen=self.window)
+
+    def delay(self) -> float:
+        """Seconds to wait for an answer before hedging a new request."""
+        with self._lock:
+            self.requests += 1
+            if len(self._latencies) < self.min_samples:
+                return self.initial_delay
+            latencies = sorted(self._latencies)
+        index = min(int(self.percentile * len(latencies)), len(latencies) - 1)
+        return max(self.min_delay, latencies[index])
+
+    def may_hedge(self) -> bool:
+        """Whether ``should_hedge`` could allow a hedge, without counting one."""
+        with self._lock:
+            return self.hedges + 1 <= self.budget * self.requests
+
+    def should_hedge(self) -> bool:
+        """Whether a slow request may be hedged without exceeding the budget."""
+        with self._lock:
+            if self.hedges + 1 > self.budget * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+    def record(self, latency: float) -> None:
+        """Record the latency of a request which answered."""
+        with self._lock:
+            self._latencies.append(latency)
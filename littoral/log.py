@@ -0,0 +1,21 @@
+"""Logging through structlog, which is only imported once something is logged."""
+
+from typing import Any
+
+
+class LazyLogger:
+    """Stands in for ``structlog.get_logger()``, creating it on first use."""
+
+    def __init__(self) -> None:
+        self._logger: Any = None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._logger is None:
+            from structlog import get_logger
+
+            self._logger = get_logger()
+        return getattr(self._logger, name)
+
+
+def get_logger() -> LazyLogger:
+    return LazyLogger()
@@ -1,17 +1,26 @@
 from datetime import date, datetime, timedelta
 from enum import Enum
-from typing import Annotated, Any, NamedTuple, Sequence
+from typing import Annotated, Any, NamedTuple
 
-from pydantic import AliasPath, BeforeValidator, Field, NonNegativeInt, TypeAdapter
+from pydantic import AliasPath, BeforeValidator, ConfigDict, Field, NonNegativeInt
 
 from littoral.base import CamelModel
-from littoral.config import Urls
+from littoral.config import Urls, current_urls
+from littoral.paging import Page, PageRequestBuilder
+from littoral.parsers import register
 from littoral.request import URL, Request, RequestBuilder
 
 
 class TidalResource(CamelModel):
+    # Parsed resources may be shared between callers (see ``ParseMemo``).
+    model_config = CamelModel.model_config | ConfigDict(frozen=True)
+
     id: NonNegativeInt
-    urls: Urls = Field(default_factory=Urls.default)
+
+    @property
+    def urls(self) -> Urls:
+        """The api's urls, shared by every resource rather than stored on each."""
+        return current_urls()
 
 
 class Role(Enum):
@@ -89,16 +98,17 @@ class Album(TidalResource):
         x, y = size.value
         return URL(f"{self.urls.image}/{self.cover_uuid.replace('-','/')}/{x}x{y}.jpg")
 
-    def image(self, size: ImageSize = ImageSize.Small) -> RequestBuilder:
+    def image(self, size: ImageSize = ImageSize.Small) -> RequestBuilder[bytes]:
+        """The cover image: best fetched with ``Session.download``."""
         x, y = size.value
         url = f"{self.urls.image}/{self.cover_uuid.replace('-','/')}/{x}x{y}.jpg"
-        return RequestBuilder.from_model(Album, Request(method="GET", url=url))
+        return RequestBuilder(bytes, Request(method="GET", url=url))
 
     def tracks(
         self, limit: int | None = None, offset: int = 0
-    ) -> RequestBuilder[list[Track]]:
-        return RequestBuilder.from_adapter(
-            TypeAdapter(list[Track]),
+    ) -> PageRequestBuilder[Track]:
+        return PageRequestBuilder(
+            Track,
             Request(
                 method="GET",
                 url=f"{self.urls.api_v1}/albums/{self.id}/tracks",  # type: ignore
@@ -113,9 +123,9 @@ class Album(TidalResource):
 
     def items(
         self, limit: int | None = None, offset: int = 0
-    ) -> RequestBuilder[Sequence[Track | Video]]:
-        return RequestBuilder.from_adapter(
-            TypeAdapter(list[Track | Video]),
+    ) -> PageRequestBuilder[Track | Video]:
+        return PageRequestBuilder(
+            Track | Video,
             Request(
                 method="GET",
                 url=f"{self.urls.api_v1}/albums/{self.id}/items",  # type: ignore
@@ -133,3 +143,7 @@ class User(CamelModel):
     user_id: int
     email: str
     # Tidal has other fields, but I doubt we want them.
+
+
+# Parsed by paged requests; registered so that warm_up compiles them.
+register(Page[Track], Page[Track | Video], Track | Video)
@@ -0,0 +1,58 @@
+"""Paged listings, and the requests to walk them."""
+
+from typing import Any, Generic, Protocol
+
+from pydantic import Field
+
+from littoral.base import CamelModel
+from littoral.parsers import parser, projection
+from littoral.request import Request, RequestBuilder, T
+from littoral.streaming import ItemsRequestBuilder
+
+
+class Page(CamelModel, Generic[T]):
+    """A single page of a paged listing."""
+
+    limit: int
+    offset: int
+    total: int = Field(alias="totalNumberOfItems")
+    items: list[T]
+
+    def remaining_offsets(self) -> range:
+        """The offsets of every following page, computed from the total.
+
+        Pages follow on from this one's items, which the server may have capped
+        below the limit it echoes.
+        """
+        step = min(self.limit, len(self.items)) if self.items else self.limit
+        if not step:
+            return range(0)
+        return range(self.offset + step, self.total, step)
+
+
+class PageRequestBuilder(RequestBuilder[Page[T]], Generic[T]):
+    """Builds the request for a page, whose items can also be streamed."""
+
+    def __init__(self, item_type: Any, request: Request) -> None:
+        super().__init__(parser(Page[item_type]), request)
+        self._item_type = item_type
+
+    def only(self, *fields: str) -> "PageRequestBuilder[Any]":
+        """The same request, parsing items with only ``fields``: cheaper when
+        only a few are needed."""
+        return PageRequestBuilder(projection(self._item_type, *fields), self._request)
+
+    def streamed(self) -> ItemsRequestBuilder[T]:
+        """The same request, parsing items one at a time as they arrive.
+
+        Send it with ``Session.stream``: handy for asking for one huge page.
+        """
+        return ItemsRequestBuilder(parser(self._item_type), self._request)
+
+
+class PageFactory(Protocol[T]):
+    """Something which builds a request for a page, like ``Album.tracks``."""
+
+    def __call__(
+        self, limit: int | None = None, offset: int = 0
+    ) -> RequestBuilder[Page[T]]: ...  # pragma: nocover
@@ -0,0 +1,148 @@
+"""A registry of compiled parsers, shared by every request builder.
+
+Building a pydantic validator is far slower than running one, so each type is
+compiled once, when first needed or by ``warm_up``.
+"""
+
+import importlib
+from functools import reduce
+from operator import or_
+from threading import Lock
+from types import UnionType
+from typing import Any, Callable, Protocol, get_args
+
+from pydantic import BaseModel, TypeAdapter, create_model
+
+# Modules defining the models littoral parses.
+MODEL_MODULES = (
+    "littoral.models",
+    "littoral.paging",
+    "littoral.auth.models",
+    "littoral.auth.client_oauth2",
+)
+
+_adapters: dict[Any, TypeAdapter] = {}
+# The type each adapter parses, by the adapter's id.
+_adapted: dict[int, Any] = {}
+_registered: list[Any] = []
+_projections: dict[tuple[Any, tuple[str, ...]], Any] = {}
+_lock = Lock()
+
+
+def adapter(type_: Any) -> TypeAdapter:
+    """The shared type adapter for ``type_``, built on first use."""
+    try:
+        return _adapters[type_]
+    except KeyError:
+        pass
+    with _lock:
+        if type_ not in _adapters:
+            _adapters[type_] = TypeAdapter(type_)
+            _adapted[id(_adapters[type_])] = type_
+        return _adapters[type_]
+
+
+def parser(type_: Any) -> Callable[[bytes], Any]:
+    """A function parsing JSON into ``type_``.
+
+    Parsers for the same type compare equal, so can be used in cache keys.
+    """
+    if isinstance(type_, type) and issubclass(type_, BaseModel):
+        return type_.model_validate_json
+    return adapter(type_).validate_json
+
+
+def parsed_type(parser: Callable[[bytes], Any]) -> Any:
+    """The type a function from ``parser`` parses into, or None if unknown."""
+    owner = getattr(parser, "__self__", None)
+    if isinstance(owner, type) and issubclass(owner, BaseModel):
+        return owner
+    return _adapted.get(id(owner))
+
+
+class Decoder(Protocol):
+    """Something parsing responses differently, for a session to use in place of
+    the parsers request builders have."""
+
+    def parser(
+        self, parser: Callable[[bytes], Any]
+    ) -> Callable[[bytes], Any]: ...  # pragma: nocover
+
+
+def projection(type_: Any, *fields: str) -> Any:
+    """A model with only ``fields`` of the model ``type_`` (or of each model in
+    a union), keeping their aliases and validation.
+
+    Validating a projection skips every other field, so is cheaper when only a
+    few are needed.  Projections are built once and shared.
+    """
+    key = (type_, fields)
+    try:
+        return _projections[key]
+    except KeyError:
+        pass
+    if isinstance(type_, UnionType):
+        projected = reduce(or_, (projection(t, *fields) for t in get_args(type_)))
+    else:
+        projected = _project(type_, fields)
+    with _lock:
+        return _projections.setdefault(key, projected)
+
+
+def _project(model: Any, fields: tuple[str, ...]) -> type[BaseModel]:
+    if not (isinstance(model, type) and issubclass(model, BaseModel)):
+        raise TypeError(f"Only models can be projected, not {model!r}")
+    decorators = model.__pydantic_decorators__
+    if decorators.field_validators or decorators.model_validators:
+        # Validators may read fields which are left out.
+        raise TypeError(f"{model.__name__} has validators, so cannot be projected")
+    missing = set(fields) - set(model.model_fields)
+    if missing:
+        raise ValueError(f"{model.__name__} has no fields {sorted(missing)}")
+    return create_model(  # type: ignore[call-overload, no-any-return]
+        f"{model.__name__}[{', '.join(fields)}]",
+        __config__=model.model_config,
+        __module__=model.__module__,
+        **{
+            name: (model.model_fields[name].annotation, model.model_fields[name])
+            for name in fields
+        },
+    )
+
+
+def register(*types: Any) -> None:
+    """Note types which will be parsed, so that ``warm_up`` builds them."""
+    with _lock:
+        _registered.extend(types)
+
+
+def _models(cls: type[BaseModel] = BaseModel) -> set[type[BaseModel]]:
+    """Every concrete subclass of ``cls`` defined by littoral."""
+    found = set()
+    for subclass in cls.__subclasses__():
+        if subclass.__module__.startswith("littoral."):
+            if not subclass.__pydantic_generic_metadata__["parameters"]:
+                found.add(subclass)
+        found |= _models(subclass)
+    return found
+
+
+def warm_up() -> None:
+    """Build every model and registered parser now, rather than on first use.
+
+    Call at service start, so the first request in each worker does not pay
+    for compiling schemas.
+    """
+    for module in MODEL_MODULES:
+        importlib.import_module(module)
+    for model in _models():
+        model.model_rebuild()
+    with _lock:
+        registered = list(_registered)
+    for type_ in registered:
+        if not (isinstance(type_, type) and issubclass(type_, BaseModel)):
+            adapter(type_)
+    with _lock:
+        adapters = list(_adapters.values())
+    for type_adapter in adapters:
+        type_adapter.rebuild()
@@ -0,0 +1,118 @@
+"""Adaptive client-side rate limiting.
+
+Nothing here sleeps: limiters say how long to wait, and the sessions wait.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from time import monotonic
+from typing import Callable, Mapping
+
+
+def retry_after(headers: Mapping[str, str]) -> float | None:
+    """Seconds to wait according to a ``Retry-After`` header, if any.
+
+    The header may be a number of seconds or an http date.
+    """
+    value = next((v for k, v in headers.items() if k.lower() == "retry-after"), None)
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+@dataclass
+class TokenBucket:
+    """A token bucket which hands out reservations rather than refusing.
+
+    Taking a token from an empty bucket puts it into debt, and the caller waits
+    until the debt would have been repaid; concurrent callers thus queue up in
+    distinct slots rather than all retrying at once.
+    """
+
+    rate: float
+    capacity: float
+    tokens: float
+    updated: float
+    blocked_until: float = 0.0
+    decreased_at: float = float("-inf")
+
+    def reserve(self, now: float) -> float:
+        """Take a token, returning how long to wait before using it."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+
+@dataclass
+class RateLimiter:
+    """A per-host token bucket limiter which adapts its rate to the server.
+
+    Rates follow AIMD: every successful response nudges a host's rate up by
+    ``increase`` divided by the current rate (roughly ``increase`` requests per
+    second, per second), and every ``429 Too Many Requests`` multiplies it by
+    ``decrease`` and blocks the host for any ``Retry-After``.  The rate thus
+    settles just under the server's limit rather than oscillating between bursts
+    and failures.  Rates are cut at most once per ``cooldown`` seconds, since
+    requests already in flight will be refused too.
+    """
+
+    initial_rate: float = 10.0
+    min_rate: float = 0.5
+    max_rate: float = 100.0
+    burst: float = 10.0
+    increase: float = 1.0
+    decrease: float = 0.5
+    cooldown: float = 1.0
+    clock: Callable[[], float] = monotonic
+    _buckets: dict[str, TokenBucket] = field(default_factory=dict, init=False)
+    _lock: Lock = field(default_factory=Lock, init=False, repr=False)
+
+    def _bucket(self, host: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(
+                rate=self.initial_rate,
+                capacity=self.burst,
+                tokens=self.burst,
+                updated=now,
+            )
+        return bucket
+
+    def rate(self, host: str) -> float:
+        with self._lock:
+            return self._bucket(host, self.clock()).rate
+
+    def acquire(self, host: str) -> float:
+        """Reserve a request to ``host``, returning how long to wait before it."""
+        with self._lock:
+            now = self.clock()
+            return self._bucket(host, now).reserve(now)
+
+    def record(self, host: str, status_code: int, headers: Mapping[str, str]) -> None:
+        """Adapt to the response to a request made after ``acquire``."""
+        with self._lock:
+            now = self.clock()
+            bucket = self._bucket(host, now)
+            if status_code == 429:
+                if now - bucket.decreased_at >= self.cooldown:
+                    bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+                    bucket.decreased_at = now
+                bucket.tokens = min(bucket.tokens, 0.0)
+                if (delay := retry_after(headers)) is not None:
+                    bucket.blocked_until = max(bucket.blocked_until, now + delay)
+            elif status_code < 500:
+                bucket.rate = min(
+                    self.max_rate, bucket.rate + self.increase / bucket.rate
+                )
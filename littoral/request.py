@@ -1,21 +1,35 @@
 """A very basic request/response library to avoid depending on any implementation."""
+
+from copy import copy
 from typing import (
     TYPE_CHECKING,
     Any,
     Callable,
     Generic,
     Literal,
+    Mapping,
     NewType,
     Self,
     TypeVar,
 )
+from urllib.parse import urlencode
+
+from pydantic import (
+    AnyHttpUrl,
+    BaseModel,
+    ConfigDict,
+    Field,
+    TypeAdapter,
+    field_validator,
+)
 
-from pydantic import AnyHttpUrl, BaseModel, Field, TypeAdapter, field_validator
+from littoral.parsers import adapter, projection
 
 if TYPE_CHECKING:  # pragma: nocover
     import httpx
 
     from littoral.auth.models import ApiSession
+    from littoral.cache import ParseMemo
 
 HTTPMethod = Literal["GET", "PUT", "POST", "HEAD", "DELETE", "UPDATE"]
 
@@ -23,7 +37,46 @@ HTTPMethod = Literal["GET", "PUT", "POST", "HEAD", "DELETE", "UPDATE"]
 URL = NewType("URL", str)
 
 
-class Request(BaseModel):
+class _TransportModel(BaseModel):
+    """A model which can skip validation when built from values already valid.
+
+    Requests and responses are built on every call, mostly from values which
+    have already been validated (a built request is the builder's request plus
+    the session's params) or which httpx guarantees (response headers are
+    strings).  Validating them again costs more than sending the request.
+    """
+
+    model_config = ConfigDict(defer_build=True)
+
+    @classmethod
+    def _trusted(cls, **fields: Any) -> Self:
+        """Construct from *every* field, without validation.
+
+        Much cheaper than ``model_construct``, which handles defaults and
+        aliases.  Only for values known to be valid.
+        """
+        model = cls.__new__(cls)
+        object.__setattr__(model, "__dict__", fields)
+        object.__setattr__(model, "__pydantic_fields_set__", set(fields))
+        object.__setattr__(model, "__pydantic_extra__", None)
+        object.__setattr__(model, "__pydantic_private__", None)
+        return model
+
+
+def _encode_param(value: Any) -> str | None:
+    """Encode a query param value as httpx does, or None if not a primitive."""
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if value is None:
+        return ""
+    if isinstance(value, (str, int, float)):
+        return str(value)
+    return None
+
+
+class Request(_TransportModel):
     """An http request."""
 
     method: HTTPMethod = "GET"
@@ -35,16 +88,26 @@ class Request(BaseModel):
     def to_httpx(self) -> "httpx.Request":
         import httpx
 
+        url = str(self.url)
+        params: dict[str, Any] | None = self.params
+        # Merging params into a url is the slowest part of building an httpx
+        # request, so encode simple params into the url directly.
+        if params and not self.url.query:
+            encoded = {k: _encode_param(v) for k, v in params.items()}
+            if None not in encoded.values():
+                url = f"{url}?{urlencode(encoded)}"
+                params = None
+
         return httpx.Request(
             method=self.method,
-            url=str(self.url),
-            params=self.params,
+            url=url,
+            params=params,
             headers=self.headers,
             data=self.data,
         )
 
 
-class Response(BaseModel):
+class Response(_TransportModel):
     """An http response."""
 
     status_code: int
@@ -59,10 +122,11 @@ class Response(BaseModel):
 
     @classmethod
     def from_httpx(cls, httpx_response: "httpx.Response") -> Self:
-        return cls(
+        # httpx has already validated everything but the url's scheme.
+        return cls._trusted(
             status_code=httpx_response.status_code,
-            url=str(httpx_response.url),  # type: ignore
-            headers=httpx_response.headers,  # type: ignore
+            url=adapter(AnyHttpUrl).validate_python(str(httpx_response.url)),
+            headers=dict(httpx_response.headers.items()),
             data=httpx_response.read(),
         )
 
@@ -75,6 +139,12 @@ class RequestBuilder(Generic[T]):
     def __init__(self, parser: Callable[[bytes], T], request: Request) -> None:
         self._parser = parser
         self._request = request
+        # The last request built, and the session params and headers it used.
+        self._built: tuple[Mapping[str, str], Mapping[str, str], Request] | None = None
+
+    @property
+    def parser(self) -> Callable[[bytes], T]:
+        return self._parser
 
     @classmethod
     def from_model(
@@ -91,16 +161,53 @@ class RequestBuilder(Generic[T]):
         return cls(adapter.validate_json, request)
 
     def build(self, session: "ApiSession") -> Request:
-        """Build this request with the given token."""
-        return self._request.model_copy(
-            update={
-                "params": session.params() | self._request.params,
-                "headers": session.headers() | self._request.headers,
-            }
-        )
-
-    def parse(self, response: Response) -> T:
-        """Parse the server's response to the correct model."""
+        """Build this request with the given token.
+
+        The session's params and headers only change when it gets a new token,
+        so building again with the same token returns the same request, which
+        must therefore not be mutated.
+        """
+        params, headers = session.shared_params(), session.shared_headers()
+        built = self._built
+        if built is None or built[0] is not params or built[1] is not headers:
+            request = self._request
+            built = self._built = (
+                params,
+                headers,
+                Request._trusted(
+                    method=request.method,
+                    url=request.url,
+                    params={**params, **request.params},
+                    headers={**headers, **request.headers},
+                    data=request.data,
+                ),
+            )
+        return built[2]
+
+    def parsed_with(self, parser: Callable[[bytes], Any]) -> "RequestBuilder[Any]":
+        """This builder, parsing with ``parser`` instead."""
+        if parser == self._parser:
+            return self
+        builder = copy(self)
+        builder._parser = parser
+        return builder
+
+    def only(self, *fields: str) -> "RequestBuilder[Any]":
+        """The same request, parsed into a model with only ``fields`` of this
+        one's: cheaper when only a few are needed."""
+        # Requests parsed into a model parse with its model_validate_json.
+        model = getattr(self._parser, "__self__", None)
+        projected = projection(model, *fields)
+        return type(self)(projected.model_validate_json, self._request)
+
+    def parse(self, response: Response, memo: "ParseMemo | None" = None) -> T:
+        """Parse the server's response to the correct model.
+
+        Given a ``memo``, a response identical to one already parsed returns the
+        same result, without validating it again.
+        """
+        if memo is not None:
+            return memo.parse(self._parser, response.data)
         return self._parser(response.data)
         return (
             self._parser.validate_json(response.data)
@@ -0,0 +1,105 @@
+"""When and how long to wait before retrying failed requests.
+
+As with rate limiting, nothing here sleeps: the policy says whether and how long
+to wait, and the sessions wait.
+"""
+
+import random
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Callable
+
+from littoral.request import HTTPMethod
+
+# Methods which may be repeated without changing the outcome.
+IDEMPOTENT_METHODS: frozenset[HTTPMethod] = frozenset({"GET", "HEAD", "PUT", "DELETE"})
+
+# Transient failures: the server may well answer next time.
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+@dataclass
+class RetryBudget:
+    """A session-wide cap on retries as a fraction of requests.
+
+    Every request earns ``ratio`` of a retry, and every retry spends a whole
+    one, up to a reserve of ``max_tokens``.  Whilst everything is healthy the
+    reserve stays full; during an outage retries quickly exhaust it, so at most
+    about ``ratio`` extra load is sent to a struggling server rather than
+    ``max_attempts`` times as much.
+    """
+
+    ratio: float = 0.2
+    max_tokens: float = 10.0
+    tokens: float = field(init=False)
+    _lock: Lock = field(default_factory=Lock, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.tokens = self.max_tokens
+
+    def deposit(self) -> None:
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Spend a retry, if any are left."""
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+@dataclass
+class RetryPolicy:
+    """Which failed requests to retry, and how long to back off first.
+
+    Responses with a status in ``statuses`` and (if ``retry_errors``) requests
+    which failed without any response, such as reset connections, are retried up
+    to ``max_attempts`` attempts in all.  Only ``methods`` are retried, since a
+    non-idempotent request may have taken effect before it failed; a ``429 Too
+    Many Requests`` was refused outright, so is retried whatever the method.
+
+    Between attempts the policy backs off exponentially from ``base_delay`` up to
+    ``max_delay``, with "full jitter" (a random delay up to that bound) so that
+    clients which failed together do not retry together.
+    """
+
+    max_attempts: int = 3
+    statuses: frozenset[int] = RETRY_STATUSES
+    retry_errors: bool = True
+    methods: frozenset[HTTPMethod] = IDEMPOTENT_METHODS
+    base_delay: float = 0.1
+    max_delay: float = 10.0
+    multiplier: float = 2.0
+    jitter: bool = True
+    budget: RetryBudget | None = field(default_factory=RetryBudget)
+    random: Callable[[], float] = random.random
+
+    def started(self) -> None:
+        """Note a new request (not a retry), earning retry budget."""
+        if self.budget is not None:
+            self.budget.deposit()
+
+    def should_retry(
+        self, method: HTTPMethod, attempt: int, status_code: int | None = None
+    ) -> bool:
+        """Whether to retry after attempt ``attempt`` (counting from 0) failed.
+
+        ``status_code`` is None if the attempt failed without a response.
+        """
+        if attempt + 1 >= self.max_attempts:
+            return False
+        if status_code is None:
+            if not self.retry_errors:
+                return False
+        elif status_code not in self.statuses:
+            return False
+        if method not in self.methods and status_code != 429:
+            return False
+        return self.budget is None or self.budget.withdraw()
+
+    def backoff(self, attempt: int) -> float:
+        """Seconds to wait before retrying attempt ``attempt``."""
+        delay = min(self.max_delay, self.base_delay * self.multiplier**attempt)
+        return delay * self.random() if self.jitter else delay
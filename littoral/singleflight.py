@@ -0,0 +1,82 @@
+"""Coalescing identical concurrent calls into a single call."""
+
+import asyncio
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Awaitable, Callable, Hashable
+
+from littoral.request import T
+
+
+@dataclass
+class SingleFlightStats:
+    calls: int = 0
+    coalesced: int = 0
+
+
+@dataclass
+class SingleFlight:
+    """Run at most one call per key at a time, sharing its result between threads.
+
+    A thread calling ``do`` whilst another call with the same key is in flight
+    waits for that call's result (or exception) rather than making its own.
+    """
+
+    stats: SingleFlightStats = field(default_factory=SingleFlightStats, init=False)
+    _calls: dict[Hashable, Future] = field(default_factory=dict, init=False)
+    _lock: Lock = field(default_factory=Lock, init=False, repr=False)
+
+    def do(self, key: Hashable, fn: Callable[[], T], timeout: float | None = None) -> T:
+        """Call ``fn``, or wait up to ``timeout`` for an identical call's result."""
+        with self._lock:
+            self.stats.calls += 1
+            future = self._calls.get(key)
+            if future is not None:
+                self.stats.coalesced += 1
+            else:
+                self._calls[key] = leader = Future[T]()
+
+        if future is not None:
+            return future.result(timeout)
+
+        try:
+            result = fn()
+        except BaseException as e:
+            leader.set_exception(e)
+            raise
+        else:
+            leader.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+@dataclass
+class AsyncSingleFlight:
+    """Run at most one call per key at a time, sharing its result between tasks.
+
+    The call runs in its own task, so cancelling one waiter does not cancel it
+    for the others.
+    """
+
+    stats: SingleFlightStats = field(default_factory=SingleFlightStats, init=False)
+    _calls: dict[Hashable, asyncio.Task] = field(default_factory=dict, init=False)
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[T]],
+        timeout: float | None = None,
+    ) -> T:
+        """Call ``fn``, or wait up to ``timeout`` for an identical call's result."""
+        self.stats.calls += 1
+        task = self._calls.get(key)
+        if task is not None:
+            self.stats.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return await asyncio.wait_for(asyncio.shield(task), timeout)
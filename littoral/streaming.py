@@ -0,0 +1,161 @@
+"""Parsing big JSON arrays incrementally, an item at a time.
+
+Like everything outside the sessions this does no IO: the scanner is fed the
+document a chunk at a time, by whoever is reading it.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Callable, Generic, Iterable, Iterator
+
+from littoral.request import Request, RequestBuilder, T
+
+# Bytes which can change the structure of a document outside strings...
+_STRUCTURE = re.compile(rb'["\[\]{},:]')
+# ...and which can end a string.
+_STRING_END = re.compile(rb'["\\]')
+
+_QUOTE, _BACKSLASH, _COMMA, _COLON = b'"\\,:'
+_OPEN = frozenset(b"[{")
+_CLOSE = frozenset(b"]}")
+
+
+class ItemScanner:
+    """Finds the items of a JSON array as the document containing it arrives.
+
+    The array is the value of ``key`` in the top-level object, or the document
+    itself if ``key`` is None.  Each call to ``feed`` returns the raw JSON of every
+    item completed by that chunk, so only the current item is ever buffered.
+    Only the array is checked to be well formed: the rest of the document is
+    skimmed for structure and otherwise ignored.
+    """
+
+    def __init__(self, key: str | None = "items") -> None:
+        self._key = None if key is None else json.dumps(key).encode()
+        self._buffer = bytearray()
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._string_start = 0
+        self._expect_key = False
+        self._last_key: bytes | None = None
+        self._array_depth: int | None = None
+        self._item_start = 0
+        self.done = False
+
+    def feed(self, chunk: bytes) -> list[bytes]:
+        """Scan the next chunk of the document, returning any completed items."""
+        if self.done:
+            return []
+        buffer = self._buffer
+        buffer += chunk
+        items: list[bytes] = []
+        pos = self._pos
+        while not self.done:
+            if self._in_string:
+                match = _STRING_END.search(buffer, pos)
+                if match is None:
+                    pos = len(buffer)
+                    break
+                end = match.start()
+                if buffer[end] == _BACKSLASH:
+                    if end + 1 == len(buffer):  # the escaped byte is yet to come
+                        pos = end
+                        break
+                    pos = end + 2
+                    continue
+                pos = end + 1
+                self._in_string = False
+                if self._depth == 1 and self._expect_key:
+                    self._last_key = bytes(buffer[self._string_start : pos])
+                continue
+
+            match = _STRUCTURE.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            char, pos = buffer[match.start()], match.end()
+            if char == _QUOTE:
+                self._in_string = True
+                self._string_start = match.start()
+            elif self._depth == self._array_depth and char in b",]":
+                item = bytes(buffer[self._item_start : match.start()]).strip()
+                if item:
+                    items.append(item)
+                elif char == _COMMA:
+                    raise ValueError("Empty item in JSON array")
+                self._item_start = pos
+                self.done = char != _COMMA
+            elif char in _OPEN:
+                self._depth += 1
+                self._expect_key = self._depth == 1 and char != ord("[")
+                if self._array_depth is None and self._is_array(char):
+                    self._array_depth = self._depth
+                    self._item_start = pos
+            elif char in _CLOSE:
+                self._depth -= 1
+            elif self._depth == 1:
+                self._expect_key = char == _COMMA
+
+        # Forget everything which cannot be part of an item or a key to come.
+        keep = min(
+            self._item_start if self._array_depth is not None else pos,
+            self._string_start if self._in_string else pos,
+        )
+        del buffer[:keep]
+        self._pos = pos - keep
+        self._item_start = max(self._item_start - keep, 0)
+        self._string_start = max(self._string_start - keep, 0)
+        return items
+
+    def _is_array(self, char: int) -> bool:
+        if char != ord("["):
+            return False
+        if self._key is None:
+            return self._depth == 1
+        return self._depth == 2 and self._last_key == self._key
+
+    def close(self) -> None:
+        """Check the whole array was seen."""
+        if not self.done:
+            raise ValueError("JSON document ended before the array")
+
+
+@dataclass(frozen=True)
+class ItemsParser(Generic[T]):
+    """Parse the items of an array in a JSON document, as a list or one by one."""
+
+    item_parser: Callable[[bytes], T]
+    key: str | None = "items"
+
+    def __call__(self, data: bytes) -> list[T]:
+        return list(self.iter([data]))
+
+    def scanner(self) -> ItemScanner:
+        return ItemScanner(self.key)
+
+    def iter(self, chunks: Iterable[bytes]) -> Iterator[T]:
+        scanner = self.scanner()
+        for chunk in chunks:
+            for item in scanner.feed(chunk):
+                yield self.item_parser(item)
+        scanner.close()
+
+
+class ItemsRequestBuilder(RequestBuilder[list[T]], Generic[T]):
+    """Builds a request whose response is (or contains) a big JSON array.
+
+    Sending it as usual parses the whole array into a list; ``Session.stream``
+    instead parses and yields items one at a time as the response arrives, so
+    only one is ever held in memory.
+    """
+
+    def __init__(
+        self,
+        item_parser: Callable[[bytes], T],
+        request: Request,
+        key: str | None = "items",
+    ) -> None:
+        self.items_parser = ItemsParser(item_parser, key)
+        super().__init__(self.items_parser, request)
@@ -0,0 +1,184 @@
+"""Parsing into msgspec structs mirroring littoral's models.
+
+msgspec decodes JSON straight into slotted structs, skipping unwanted keys in C,
+which is faster and smaller than building pydantic models.  Each model is
+mirrored by a struct with the same fields, read from the same keys.  Fields
+msgspec can't validate exactly as the model does (anything with validators or
+constraints, dates, enums, urls) are handed to pydantic as they are decoded, so
+the values are the same.
+
+Structs have the models' data but not their methods, so only resources (and
+lists of them) are decoded into structs: pages, tokens and everything else in
+``littoral.auth`` are parsed as usual, since the session itself relies on their
+methods.  Choose them per session::
+
+    http_session = HttpSession(decoder=StructDecoder())
+
+Resources which can't be mirrored (unions of models, models with validators)
+are still parsed by pydantic.  Needs the ``msgspec`` extra.
+"""
+
+from dataclasses import asdict
+from enum import Enum
+from functools import cache
+from threading import Lock
+from types import NoneType, UnionType
+from typing import Annotated, Any, Callable, Mapping, Union, get_args, get_origin
+
+import msgspec
+from annotated_types import Ge, Gt, Le, Lt
+from pydantic import AliasPath, BaseModel, TypeAdapter
+from pydantic.fields import FieldInfo
+from pydantic_core import PydanticUndefined
+
+from littoral.models import TidalResource
+from littoral.parsers import parsed_type
+
+_NATIVE = (int, str, bool, float, NoneType)
+
+
+def _mirror(annotation: Any) -> Any:
+    """The type msgspec decodes in place of ``annotation``."""
+    if annotation in _NATIVE:
+        return annotation
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return struct(annotation)
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        values = {type(member.value) for member in annotation}
+        if values == {str} or values == {int}:
+            return annotation
+    origin, args = get_origin(annotation), get_args(annotation)
+    if origin is list:
+        return list[_mirror(args[0])]  # type: ignore[misc]
+    if origin in (Union, UnionType) and len(args) == 2 and NoneType in args:
+        (inner,) = (arg for arg in args if arg is not NoneType)
+        return _mirror(inner) | None
+    raise TypeError(f"Cannot mirror {annotation!r}")
+
+
+def _key(name: str, info: FieldInfo) -> str:
+    """The key the model reads a field from."""
+    alias = info.validation_alias or info.alias or name
+    if isinstance(alias, AliasPath) and len(alias.path) == 1:
+        (alias,) = alias.path  # type: ignore[assignment]
+    if not isinstance(alias, str):
+        raise TypeError(f"Cannot mirror the alias of {name}")
+    return alias
+
+
+def _field_type(name: str, info: FieldInfo) -> Any:
+    bounds = {}
+    for constraint in info.metadata:
+        if not isinstance(constraint, (Ge, Gt, Le, Lt)):
+            raise TypeError(f"Cannot mirror the constraints on {name}")
+        bounds.update(asdict(constraint))
+    type_ = _mirror(info.annotation)
+    return Annotated[type_, msgspec.Meta(**bounds)] if bounds else type_
+
+
+def _default(name: str, info: FieldInfo) -> Any:
+    if info.default_factory is not None:
+        return msgspec.field(
+            name=_key(name, info),
+            default_factory=info.default_factory,  # type: ignore[arg-type]
+        )
+    if info.default is not PydanticUndefined:
+        return msgspec.field(name=_key(name, info), default=info.default)
+    return msgspec.field(name=_key(name, info))
+
+
+def _is_number(annotation: Any) -> bool:
+    if annotation in (int, float):
+        return True
+    args = get_args(annotation)
+    return len(args) == 2 and NoneType in args and any(a in (int, float) for a in args)
+
+
+def _validating(
+    validators: Mapping[str, tuple[Callable[[Any], Any], Any]],
+    numbers: Mapping[str, Callable[[Any], Any]],
+) -> Callable[[msgspec.Struct], None]:
+    """A ``__post_init__`` validating fields msgspec decoded as they came, and
+    numbers it found as strings."""
+
+    def __post_init__(self: msgspec.Struct) -> None:
+        for name, (validate, default) in validators.items():
+            value = getattr(self, name)
+            # Like pydantic, leave defaults be.
+            if value is not default:
+                setattr(self, name, validate(value))
+        for name, validate in numbers.items():
+            value = getattr(self, name)
+            if value.__class__ is str:
+                setattr(self, name, validate(value))
+
+    return __post_init__
+
+
+@cache
+def struct(model: type[BaseModel]) -> type[msgspec.Struct]:
+    """The struct mirroring ``model``."""
+    decorators = model.__pydantic_decorators__
+    if decorators.field_validators or decorators.model_validators:
+        raise TypeError(f"{model.__name__} has validators, so cannot be mirrored")
+    fields = []
+    validators = {}
+    numbers = {}
+    for name, info in model.model_fields.items():
+        annotation = (
+            Annotated[info.annotation, *info.metadata]
+            if info.metadata
+            else info.annotation
+        )
+        validate = TypeAdapter(annotation).validator.validate_python  # type: ignore[arg-type]
+        try:
+            type_ = _field_type(name, info)
+        except TypeError:
+            # Decoded as it comes, then validated by pydantic.
+            type_ = Any
+            validators[name] = (validate, info.default)
+        else:
+            if _is_number(info.annotation):
+                # pydantic also reads numbers from strings, like "00602".
+                type_ = type_ | str
+                numbers[name] = validate
+        fields.append((name, type_, _default(name, info)))
+    return msgspec.defstruct(
+        model.__name__,
+        fields,
+        kw_only=True,
+        module=model.__module__,
+        namespace={"__post_init__": _validating(validators, numbers)},
+    )
+
+
+def _is_resource(type_: Any) -> bool:
+    """Whether ``type_`` is a resource or a list of them."""
+    if get_origin(type_) is list:
+        (type_,) = get_args(type_)
+    return isinstance(type_, type) and issubclass(type_, TidalResource)
+
+
+class StructDecoder:
+    """Parses resources into structs, where the type parsed can be mirrored."""
+
+    def __init__(self) -> None:
+        self._parsers: dict[Any, Callable[[bytes], Any]] = {}
+        self._lock = Lock()
+
+    def parser(self, parser: Callable[[bytes], Any]) -> Callable[[bytes], Any]:
+        """The struct parser standing in for the model ``parser``, if any."""
+        type_ = parsed_type(parser)
+        if not _is_resource(type_):
+            return parser
+        try:
+            return self._parsers[type_]
+        except KeyError:
+            pass
+        replacement: Callable[[bytes], Any]
+        try:
+            replacement = msgspec.json.Decoder(_mirror(type_), strict=False).decode
+        except TypeError:
+            replacement = parser
+        with self._lock:
+            return self._parsers.setdefault(type_, replacement)
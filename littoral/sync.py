@@ -1,12 +1,29 @@
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
 from dataclasses import dataclass, field
+from datetime import timedelta
+from functools import cached_property
+from itertools import chain, count, islice
 from pathlib import Path
+from threading import Lock, Timer
+from time import monotonic, sleep
+from typing import BinaryIO, Callable, Iterable, Iterator, TypeVar
 
-from httpx import Client, HTTPStatusError
-from structlog import get_logger
+from httpx import Client, HTTPStatusError, TimeoutException, TransportError
+from httpx import Response as HttpxResponse
 from typing_extensions import Self
 
 import littoral.auth.client_oauth2 as oauth2
 from littoral.auth.models import AccessToken, ApiSession, ClientConfig, RefreshToken
+from littoral.auth.store import TokenStore
+from littoral.cache import MISSING, DiskCache, MemoryCache, ParseMemo, parsed_key
+from littoral.circuit import CircuitBreaker, CircuitOpen
+from littoral.deadline import Deadline, DeadlineExceeded
+from littoral.hedging import HedgingPolicy
+from littoral.log import get_logger
+from littoral.paging import Page, PageFactory
+from littoral.parsers import Decoder
+from littoral.ratelimit import RateLimiter, retry_after
 from littoral.request import (
     Request,
     RequestBuilder,
@@ -14,43 +31,427 @@ from littoral.request import (
     StatelessRequestBuilder,
     T,
 )
+from littoral.retry import RetryPolicy
+from littoral.singleflight import SingleFlight
+from littoral.streaming import ItemsRequestBuilder
 
 logger = get_logger()
 
+R = TypeVar("R")
+
 
 @dataclass
 class HttpSession:
     client: Client = field(default_factory=Client)
-    max_attempts: int = 3
+    cache: MemoryCache | None = None
+    disk_cache: DiskCache | None = None
+    rate_limiter: RateLimiter | None = None
+    retry: RetryPolicy = field(default_factory=RetryPolicy)
+    single_flight: SingleFlight | None = None
+    hedging: HedgingPolicy | None = None
+    circuit_breaker: CircuitBreaker | None = None
+    decoder: Decoder | None = None
+    parse_memo: ParseMemo | None = None
 
-    def send(self, request_builder: StatelessRequestBuilder[T]) -> T:
+    def send(
+        self,
+        request_builder: StatelessRequestBuilder[T],
+        deadline: Deadline | None = None,
+    ) -> T:
         request = request_builder.build()
-        return self.send_request(request, request_builder)
+        return self.send_request(request, request_builder, deadline)
+
+    def send_request(
+        self,
+        request: Request,
+        builder: RequestBuilder[T],
+        deadline: Deadline | None = None,
+    ) -> T:
+        if self.decoder is not None:
+            builder = builder.parsed_with(self.decoder.parser(builder.parser))
+        if self.cache is not None:
+            cached = self.cache.get(request, builder)
+            if cached is not MISSING:
+                return cached  # type: ignore
+
+        if self.single_flight is not None and request.method == "GET":
+            try:
+                result = self.single_flight.do(
+                    parsed_key(request, builder),
+                    lambda: self._send_request(request, builder, deadline),
+                    timeout=None if deadline is None else deadline.remaining(),
+                )
+            except DeadlineExceeded:
+                raise
+            except TimeoutError as e:
+                # A coalesced caller ran out of time waiting for the leader.
+                if deadline is not None and not deadline.remaining():
+                    raise DeadlineExceeded from e
+                raise
+        else:
+            result = self._send_request(request, builder, deadline)
+
+        if self.cache is not None:
+            self.cache.put(request, builder, result)
+        return result
+
+    def _send_request(
+        self, request: Request, builder: RequestBuilder[T], deadline: Deadline | None
+    ) -> T:
+        return builder.parse(self._fetch(request, deadline), self.parse_memo)
+
+    def _fetch(self, request: Request, deadline: Deadline | None) -> Response:
+        stored = self.disk_cache.get(request) if self.disk_cache else None
+        conditional = (
+            request if stored is None else DiskCache.conditional(request, stored)
+        )
+        try:
+            resp = self._send_with_retries(conditional, deadline)
+        except CircuitOpen:
+            if stored is None:
+                raise
+            logger.info("Circuit open: serving stale response", request=request)
+            return stored
+        if resp.status_code == 304 and stored is not None:
+            return stored
+        resp.raise_for_status()
+        response = Response.from_httpx(resp)
+        if self.disk_cache is not None:
+            self.disk_cache.put(request, response)
+        return response
 
-    def send_request(self, request: Request, builder: RequestBuilder[T]) -> T:
-        for attempt in range(self.max_attempts):
+    def download(
+        self, request: Request, file: BinaryIO, deadline: Deadline | None = None
+    ) -> int:
+        """Stream the body of the response to ``request`` into ``file``.
+
+        The body is written a chunk at a time as it arrives, so is never held in
+        memory whole: use this for images and other large downloads.  Responses
+        are not cached.  Returns the number of bytes written.
+        """
+        resp = self._send_with_retries(request, deadline, stream=True)
+        try:
+            resp.raise_for_status()
+            written = 0
+            for chunk in self._chunks(resp, deadline):
+                file.write(chunk)
+                written += len(chunk)
+            return written
+        finally:
+            resp.close()
+
+    def stream(
+        self,
+        request: Request,
+        builder: ItemsRequestBuilder[T],
+        deadline: Deadline | None = None,
+    ) -> Iterator[T]:
+        """Yield the items of the response to ``request`` as they arrive.
+
+        Each item is parsed as soon as it has been downloaded, so the whole
+        response is never held in memory.  Responses are not cached.  The
+        ``deadline`` bounds getting the response, and each read is bounded by a
+        read timeout clipped to it, but the time the caller spends on items is
+        its own.
+        """
+        resp = self._send_with_retries(request, deadline, stream=True)
+        try:
+            resp.raise_for_status()
+            yield from builder.items_parser.iter(resp.iter_bytes())
+        finally:
+            resp.close()
+
+    @staticmethod
+    def _chunks(resp: HttpxResponse, deadline: Deadline | None) -> Iterator[bytes]:
+        for chunk in resp.iter_bytes():
+            yield chunk
+            if deadline is not None:
+                deadline.check()
+
+    def _send_with_retries(
+        self, request: Request, deadline: Deadline | None, stream: bool = False
+    ) -> HttpxResponse:
+        """Send ``request``, retrying failures as ``retry`` allows.
+
+        Returns the first successful (or not modified) response, which must be
+        closed if ``stream``ed; any other final response raises.
+        """
+        host = request.url.host or ""
+        self.retry.started()
+        for attempt in count():
+            if self.rate_limiter is not None:
+                self._wait(self.rate_limiter.acquire(host), deadline)
+            if deadline is not None:
+                deadline.check()
             logger.debug("Sending request", attempt=attempt, request=request)
-            resp = self.client.send(request.to_httpx())
+            try:
+                resp = self._guarded_send(request, host, deadline, stream)
+            except TransportError as e:
+                if not self.retry.should_retry(request.method, attempt):
+                    raise
+                logger.info("Retrying after error", error=repr(e), request=request)
+                self._wait(self.retry.backoff(attempt), deadline)
+                continue
             status_code = resp.status_code
+            if self.rate_limiter is not None:
+                self.rate_limiter.record(host, status_code, resp.headers)
+            if 200 <= status_code <= 299 or status_code == 304:
+                return resp
+            resp.close()
             if status_code == 404:
                 raise KeyError
-            elif 200 <= status_code <= 299:
-                return builder.parse(Response.from_httpx(resp))
+            elif self.retry.should_retry(request.method, attempt, status_code):
+                delay = retry_after(resp.headers)
+                logger.info(
+                    "Retrying",
+                    status_code=status_code,
+                    retry_after=delay,
+                    request=request,
+                )
+                # A rate limiter will already make us wait before the next attempt.
+                if status_code != 429 or self.rate_limiter is None:
+                    self._wait(
+                        self.retry.backoff(attempt) if delay is None else delay,
+                        deadline,
+                    )
             else:
                 resp.raise_for_status()
 
         assert False, "Unreachable"
 
+    @staticmethod
+    def _wait(delay: float, deadline: Deadline | None) -> None:
+        if deadline is not None:
+            deadline.check_wait(delay)
+        sleep(delay)
+
+    def _guarded_send(
+        self, request: Request, host: str, deadline: Deadline | None, stream: bool
+    ) -> HttpxResponse:
+        if self.circuit_breaker is None:
+            return self._send(request, deadline, stream)
+        if not self.circuit_breaker.allow(host):
+            raise CircuitOpen(host)
+
+        start = monotonic()
+        try:
+            resp = self._send(request, deadline, stream)
+        except TransportError:
+            self.circuit_breaker.record(host, False, monotonic() - start)
+            raise
+        except BaseException:
+            # The caller's deadline passed, which says nothing about the host.
+            self.circuit_breaker.release(host)
+            raise
+        self.circuit_breaker.record(host, resp.status_code < 500, monotonic() - start)
+        return resp
+
+    def _send(
+        self, request: Request, deadline: Deadline | None, stream: bool
+    ) -> HttpxResponse:
+        try:
+            return self._hedged_send(request, deadline, stream)
+        except (TimeoutException, TimeoutError) as e:
+            if deadline is not None and not deadline.remaining():
+                raise DeadlineExceeded from e
+            raise
+
+    def _hedged_send(
+        self, request: Request, deadline: Deadline | None, stream: bool
+    ) -> HttpxResponse:
+        # Streams are downloads, too big to duplicate.
+        if self.hedging is None or request.method != "GET" or stream:
+            return (self._timed_send(request, deadline, stream))[0]
+        # A request which cannot be hedged is sent from the calling thread;
+        # otherwise it is sent from the pool, to be answered whilst it waits.
+        delay = self.hedging.delay()
+        if not self.hedging.may_hedge():
+            resp, latency = self._timed_send(request, deadline)
+            self.hedging.record(latency)
+            return resp
+
+        futures = [self._hedge_pool.submit(self._timed_send, request, deadline)]
+        done, _ = wait(futures, timeout=delay)
+        # Still queued rather than slow: a hedge would only queue behind it.
+        if not done and futures[0].running() and self.hedging.should_hedge():
+            logger.debug("Hedging request", request=request)
+            futures.append(self._hedge_pool.submit(self._timed_send, request, deadline))
+
+        # Take the first answer; the loser cannot be interrupted, so is ignored.
+        errors = []
+        timeout = None if deadline is None else deadline.remaining()
+        for future in as_completed(futures, timeout=timeout):
+            try:
+                resp, latency = future.result()
+            except Exception as e:
+                errors.append(e)
+            else:
+                self.hedging.record(latency)
+                return resp
+        raise errors[0]
+
+    def _timed_send(
+        self, request: Request, deadline: Deadline | None, stream: bool = False
+    ) -> tuple[HttpxResponse, float]:
+        httpx_request = request.to_httpx()
+        if deadline is not None:
+            httpx_request.extensions["timeout"] = deadline.clip(
+                self.client.timeout.as_dict()
+            )
+        start = monotonic()
+        resp = self.client.send(httpx_request, stream=stream)
+        return resp, monotonic() - start
+
+    @cached_property
+    def _hedge_pool(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(thread_name_prefix="littoral-hedge")
+
+    def close(self) -> None:
+        """Shut down the hedging threads (if any were started) and the client."""
+        if "_hedge_pool" in self.__dict__:
+            self._hedge_pool.shutdown()
+            del self._hedge_pool
+        self.client.close()
+
+
+def _started(items: Iterator[T]) -> Iterator[T]:
+    """Start ``items`` now, so that any error sending its request is raised now."""
+    try:
+        first = next(items)
+    except StopIteration:
+        return iter(())
+    return chain((first,), items)
+
+
+@dataclass
+class TokenManager:
+    """Keeps an api session's access token fresh.
+
+    Once started, tokens are refreshed on a background timer ``refresh_margin``
+    before they expire, so requests never wait for a refresh unless the token has
+    actually expired (say, because background refreshing failed).  Only one
+    refresh is ever in flight: concurrent callers wait on it, and the new token
+    is swapped into ``api_session`` in a single assignment.  Given a ``store``,
+    refreshes are also coordinated with other processes sharing it.
+    """
+
+    api_session: ApiSession
+    http_session: HttpSession
+    refresh_margin: timedelta = timedelta(minutes=5)
+    retry_interval: timedelta = timedelta(seconds=30)
+    store: TokenStore | None = None
+    _lock: Lock = field(default_factory=Lock, init=False, repr=False)
+    _timer: Timer | None = field(default=None, init=False, repr=False)
+    _stopped: bool = field(default=False, init=False, repr=False)
+
+    def current(self, deadline: Deadline | None = None) -> AccessToken:
+        """The current access token, refreshed first if it has expired."""
+        access_token = self.api_session.access_token
+        if access_token.is_expired():
+            self.refresh(access_token, deadline)
+        return self.api_session.access_token
+
+    def refresh(self, stale: AccessToken, deadline: Deadline | None = None) -> None:
+        """Replace ``stale`` with a new access token, unless already replaced."""
+        timeout = -1 if deadline is None else deadline.remaining()
+        if not self._lock.acquire(timeout=timeout):
+            raise DeadlineExceeded
+        try:
+            if self.api_session.access_token is not stale:
+                return
+            if self.store is None:
+                self._fetch_new_token(deadline)
+            else:
+                if not self.store.acquire(
+                    None if deadline is None else deadline.remaining()
+                ):
+                    raise DeadlineExceeded
+                try:
+                    stored = self.store.fresher_token(stale, self.refresh_margin)
+                    if stored is not None:
+                        logger.debug("Using access token refreshed by another process")
+                        self.api_session.refresh_token = stored.refresh_token
+                        self.api_session.access_token = stored.access_token
+                    else:
+                        self._fetch_new_token(deadline)
+                        self.store.save(self.api_session)
+                finally:
+                    self.store.release()
+            # Tokens which don't outlast the margin are still kept a while,
+            # rather than refreshed again straight away.
+            self._schedule(
+                max(
+                    self.api_session.access_token.refresh_in(self.refresh_margin),
+                    self.retry_interval,
+                )
+            )
+        finally:
+            self._lock.release()
+
+    def _fetch_new_token(self, deadline: Deadline | None) -> None:
+        logger.debug("Refreshing access token")
+        access_token = self.http_session.send(
+            self.api_session.new_access_token(), deadline
+        )
+        self.api_session.access_token = access_token
+
+    def start(self) -> None:
+        with self._lock:
+            self._stopped = False
+            self._schedule(
+                self.api_session.access_token.refresh_in(self.refresh_margin)
+            )
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stopped = True
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _schedule(self, delay: timedelta) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        if self._stopped:
+            return
+        self._timer = Timer(max(delay.total_seconds(), 0), self._refresh_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self.refresh(self.api_session.access_token)
+        except Exception:
+            logger.exception("Background token refresh failed")
+            with self._lock:
+                self._schedule(self.retry_interval)
+
 
 @dataclass
 class Session:
     api_session: ApiSession
     http_session: HttpSession
+    max_workers: int = 8
+    refresh_margin: timedelta = timedelta(minutes=5)
+    token_store: TokenStore | None = None
+    timeout: float | None = None
+    _executor: ThreadPoolExecutor | None = field(default=None, init=False, repr=False)
+    _executor_lock: Lock = field(default_factory=Lock, init=False, repr=False)
+    _tokens: TokenManager = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._tokens = TokenManager(
+            self.api_session,
+            self.http_session,
+            self.refresh_margin,
+            store=self.token_store,
+        )
+        self._tokens.start()
 
     @classmethod
-    def login_oauth_simple(
-        cls, client_config: ClientConfig = oauth2.android_client_config
-    ) -> Self:
+    def login_oauth_simple(cls, client_config: ClientConfig | None = None) -> Self:
+        if client_config is None:
+            client_config = oauth2.default_client_config()
         http_session = HttpSession()
         flow = http_session.send(oauth2.auth_request(client_config))
         print(  # noqa: T201
@@ -75,36 +476,171 @@ class Session:
         )
 
     @classmethod
-    def from_api_session(cls, api_session: ApiSession) -> Self:
+    def from_api_session(
+        cls, api_session: ApiSession, token_store: TokenStore | None = None
+    ) -> Self:
         http_session = HttpSession()
-        session = cls(api_session, http_session)
-        if api_session.access_token.is_expired():
-            session._refresh_access_token()
+        session = cls(api_session, http_session, token_store=token_store)
+        session._tokens.current()
 
         return session
 
     def dump_to_file(self, file: Path) -> None:
-        file.write_text(self.api_session.model_dump_json(by_alias=True))
+        TokenStore(file).save(self.api_session)
 
     @classmethod
     def from_file(cls, file: Path) -> Self:
-        api_session = ApiSession.model_validate_json(file.read_bytes())
-        return cls.from_api_session(api_session)
+        """Load a session from ``file``, sharing its tokens with other processes.
 
-    def _refresh_access_token(self) -> None:
-        access_token = self.http_session.send(self.api_session.new_access_token())
-        self.api_session.access_token = access_token
+        Refreshed tokens are written back to ``file``, and tokens refreshed by
+        other processes are picked up from it.
+        """
+        store = TokenStore(file)
+        return cls.from_api_session(store.load(), store)
+
+    def send(
+        self, request_builder: RequestBuilder[T], timeout: float | None = None
+    ) -> T:
+        """Send a request, handling authentication.
+
+        ``timeout`` (default: the session's ``timeout``) bounds the whole call,
+        including any token refreshes and retries, raising ``DeadlineExceeded``
+        if it cannot complete in time.
+        """
+        return self._authenticated(
+            request_builder,
+            timeout,
+            lambda request, deadline: self.http_session.send_request(
+                request, request_builder, deadline
+            ),
+        )
 
-    def send(self, request_builder: RequestBuilder[T]) -> T:
-        request = request_builder.build(self.api_session)
-        if self.api_session.access_token.is_expired():
-            self._refresh_access_token()
+    def download(
+        self,
+        request_builder: RequestBuilder,
+        file: BinaryIO,
+        timeout: float | None = None,
+    ) -> int:
+        """Stream a response's body into ``file``, handling authentication.
 
+        See ``HttpSession.download``.
+        """
+        return self._authenticated(
+            request_builder,
+            timeout,
+            lambda request, deadline: self.http_session.download(
+                request, file, deadline
+            ),
+        )
+
+    def stream(
+        self, request_builder: ItemsRequestBuilder[T], timeout: float | None = None
+    ) -> Iterator[T]:
+        """Send a request, yielding the items of its response as they arrive.
+
+        See ``HttpSession.stream``.  ``timeout`` bounds the wait for the first
+        item; after that it only bounds each read.
+        """
+        yield from self._authenticated(
+            request_builder,
+            timeout,
+            lambda request, deadline: _started(
+                self.http_session.stream(request, request_builder, deadline)
+            ),
+        )
+
+    def _authenticated(
+        self,
+        request_builder: RequestBuilder,
+        timeout: float | None,
+        send: Callable[[Request, Deadline | None], R],
+    ) -> R:
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None if timeout is None else Deadline.after(timeout)
+        access_token = self._tokens.current(deadline)
         try:
-            return self.http_session.send_request(request, request_builder)
+            return send(request_builder.build(self.api_session), deadline)
         except HTTPStatusError as e:
             if e.response.status_code == 401:
-                self._refresh_access_token()
-                return self.http_session.send_request(request, request_builder)
+                self._tokens.refresh(access_token, deadline)
+                return send(request_builder.build(self.api_session), deadline)
             else:
                 raise
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """The thread pool used for concurrent requests, created on first use.
+
+        All workers share ``http_session.client`` and thus its connection pool.
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="littoral"
+                )
+            return self._executor
+
+    def submit(self, request_builder: RequestBuilder[T]) -> Future[T]:
+        """Send a request in the background."""
+        return self.executor.submit(self.send, request_builder)
+
+    def map(self, request_builders: Iterable[RequestBuilder[T]]) -> Iterator[T]:
+        """Send requests concurrently, yielding results in order."""
+        futures = [self.submit(rb) for rb in request_builders]
+        return (future.result() for future in futures)
+
+    def as_completed(
+        self, request_builders: Iterable[RequestBuilder[T]]
+    ) -> Iterator[tuple[RequestBuilder[T], T]]:
+        """Send requests concurrently, yielding results as they arrive.
+
+        Results are paired with the builder which produced them, since they will
+        generally be out of order.
+        """
+        futures = {self.submit(rb): rb for rb in request_builders}
+        return ((futures[f], f.result()) for f in as_completed(futures))
+
+    def paginate(
+        self, pages: PageFactory[T], page_size: int = 100, max_concurrency: int = 1
+    ) -> Iterator[T]:
+        """Walk every page of a listing, yielding items one at a time and in order.
+
+        Once the first page reveals the total, the remaining pages are fetched in
+        the background, ``max_concurrency`` at a time, whilst earlier pages are
+        consumed.  At most ``max_concurrency + 1`` pages are held in memory.
+        """
+        if max_concurrency < 1:
+            raise ValueError(
+                f"max_concurrency must be at least 1, not {max_concurrency}"
+            )
+        page = self.send(pages(page_size, 0))
+        offsets = iter(page.remaining_offsets())
+        window: deque[Future[Page[T]]] = deque(
+            self.submit(pages(page.limit, offset))
+            for offset in islice(offsets, max_concurrency)
+        )
+        try:
+            while True:
+                yield from page.items
+                if not window:
+                    return
+                page = window.popleft().result()
+                for offset in islice(offsets, 1):
+                    window.append(self.submit(pages(page.limit, offset)))
+        finally:
+            for future in window:
+                future.cancel()
+
+    def close(self) -> None:
+        """Shut down the thread pool (waiting for pending requests) and client."""
+        self._tokens.stop()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self.http_session.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
@@ -1,3 +1,5 @@
+from contextlib import AbstractContextManager
+
 from polyfactory.factories.pydantic_factory import ModelFactory
 
 from littoral.auth.client_oauth2 import AuthenticatedUser, SimpleOauthFlow
@@ -8,19 +10,22 @@ from littoral.auth.models import (
     RefreshToken,
     Session,
 )
-from littoral.models import Album, Artist, Urls
+from littoral.config import Urls, use_urls
+from littoral.models import Album, Artist
 from littoral.request import Request, Response
 
 
-class CommonMixin:
-    urls = Urls.default
+def override_urls(**urls: str) -> AbstractContextManager[Urls]:
+    """Build requests against the default urls with some replaced, e.g.
+    ``with override_urls(api_v1="http://localhost:8000/v1"): ...``."""
+    return use_urls(Urls.model_validate(Urls.default().model_dump() | urls))
 
 
-class AlbumFactory(ModelFactory, CommonMixin):
+class AlbumFactory(ModelFactory):
     __model__ = Album
 
 
-class ArtistFactory(ModelFactory, CommonMixin):
+class ArtistFactory(ModelFactory):
     __model__ = Artist
 
 
@@ -44,7 +49,7 @@ class ClientConfigFactory(ModelFactory):
     __model__ = ClientConfig
 
 
-class ApiSessionFactory(ModelFactory, CommonMixin):
+class ApiSessionFactory(ModelFactory):
     __model__ = ApiSession
 
     session = SessionFactory
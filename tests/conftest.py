@@ -1,3 +1,4 @@
+import time
 from datetime import datetime, timezone
 from typing import Callable
 
@@ -22,6 +23,16 @@ def _check_models_list(type_adapter: TypeAdapter, expected: str) -> None:
 
 check_models_list = fixture(lambda: _check_models_list)
 
+
+def wait_until(condition: Callable[[], bool], timeout: float = 1.0) -> None:
+    """Wait (at most ``timeout`` seconds) for another thread to make
+    ``condition`` true."""
+    expires = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < expires, "timed out waiting"
+        time.sleep(0.001)
+
+
 CheckModelsList = Callable[[TypeAdapter, str], None]
 
 
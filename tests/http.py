@@ -0,0 +1,63 @@
+"""Helpers for tests which exercise the http sessions against a mock transport."""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from littoral.auth.models import ApiSession
+from littoral.models import Artist
+from littoral.request import Request, RequestBuilder, StatelessRequestBuilder
+from littoral.testing import AccessTokenFactory, ApiSessionFactory
+
+TOKEN_URL = "https://auth.tidal.com/v1/oauth2/token"
+
+
+def artist_builder(id: int) -> RequestBuilder[Artist]:
+    return RequestBuilder.from_model(
+        Artist,
+        Request(url=f"https://api.tidal.com/v1/artists/{id}"),  # type: ignore
+    )
+
+
+def stateless_artist_builder(id: int) -> StatelessRequestBuilder[Artist]:
+    return StatelessRequestBuilder.from_model(
+        Artist,
+        Request(url=f"https://api.tidal.com/v1/artists/{id}"),  # type: ignore
+    )
+
+
+def artist_json(request: httpx.Request) -> bytes:
+    id = int(request.url.path.rsplit("/", 1)[-1])
+    return json.dumps({"id": id, "name": f"artist {id}", "picture": None}).encode()
+
+
+def token_json(access_token: str, expires_in: int = 3600) -> bytes:
+    return json.dumps(
+        {
+            "access_token": access_token,
+            "expires_in": expires_in,
+            "token_type": "Bearer",
+            "scope": "r_usr",
+        }
+    ).encode()
+
+
+def api_session(expires_at: datetime | None = None) -> ApiSession:
+    """An api session whose bearer token is "old"."""
+    expires_at = expires_at or datetime.now(timezone.utc) + timedelta(hours=1)
+    return ApiSessionFactory().build(
+        access_token=AccessTokenFactory().build(
+            access_token="old", token_type="Bearer", expires_in=expires_at
+        )
+    )
+
+
+def tracks_page(request: httpx.Request, total: int) -> bytes:
+    """Serve a page of an album's tracks, honouring limit and offset."""
+    limit = int(request.url.params["limit"])
+    offset = int(request.url.params["offset"])
+    items = [{"id": i} for i in range(offset, min(offset + limit, total))]
+    return json.dumps(
+        {"limit": limit, "offset": offset, "totalNumberOfItems": total, "items": items}
+    ).encode()
@@ -0,0 +1,548 @@
+import asyncio
+import fcntl
+import io
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from littoral.aio import HttpSession, Session
+from littoral.auth.models import AccessToken
+from littoral.auth.store import TokenStore
+from littoral.cache import DiskCache, MemoryCache, ParseMemo
+from littoral.circuit import CircuitBreaker, CircuitOpen
+from littoral.deadline import DeadlineExceeded
+from littoral.hedging import HedgingPolicy
+from littoral.request import Request, StatelessRequestBuilder
+from littoral.retry import RetryPolicy
+from littoral.singleflight import AsyncSingleFlight
+from littoral.testing import AlbumFactory
+from tests.http import (
+    TOKEN_URL,
+    api_session,
+    artist_builder,
+    artist_json,
+    stateless_artist_builder,
+    token_json,
+    tracks_page,
+)
+
+
+def make_session(handler, expires_at: datetime | None = None) -> Session:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return Session(api_session(expires_at), HttpSession(client=client))
+
+
+class TestHttpSession:
+    def test_send_parses_successful_response(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(200, content=token_json("new"))
+
+        http_session = HttpSession(
+            client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        )
+        builder = StatelessRequestBuilder.from_model(
+            AccessToken,
+            Request(method="POST", url=TOKEN_URL),  # type: ignore
+        )
+
+        token = asyncio.run(http_session.send(builder))
+
+        assert token.access_token == "new"
+
+    def test_404_raises_key_error(self):
+        http_session = HttpSession(
+            client=httpx.AsyncClient(
+                transport=httpx.MockTransport(lambda _: httpx.Response(404))
+            )
+        )
+
+        with pytest.raises(KeyError):
+            asyncio.run(http_session.send(stateless_artist_builder(1)))
+
+    def test_slow_get_hedged_and_loser_cancelled(self):
+        calls = 0
+        cancelled = False
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal calls, cancelled
+            calls += 1
+            if calls == 1:
+                try:
+                    await asyncio.sleep(1)
+                except asyncio.CancelledError:
+                    cancelled = True
+                    raise
+            return httpx.Response(200, content=artist_json(request))
+
+        hedging = HedgingPolicy(initial_delay=0.01, budget=1)
+        http_session = HttpSession(
+            client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+            hedging=hedging,
+        )
+
+        async def send():
+            artist = await http_session.send(stateless_artist_builder(1))
+            await asyncio.sleep(0)
+            return artist
+
+        assert asyncio.run(send()).id == 1
+        assert hedging.hedges == 1
+        assert cancelled
+
+    def test_open_circuit_fails_fast(self):
+        calls = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal calls
+            calls += 1
+            return httpx.Response(503, request=request)
+
+        http_session = HttpSession(
+            client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+            circuit_breaker=CircuitBreaker(min_requests=1),
+            retry=RetryPolicy(max_attempts=1),
+        )
+
+        async def send_twice() -> None:
+            with pytest.raises(httpx.HTTPStatusError):
+                await http_session.send(stateless_artist_builder(1))
+            with pytest.raises(CircuitOpen):
+                await http_session.send(stateless_artist_builder(1))
+
+        asyncio.run(send_twice())
+        assert calls == 1
+
+    def test_disk_cache_revalidates_off_the_event_loop(self, tmp_path, mocker):
+        conditions = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            conditions.append(request.headers.get("if-none-match"))
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(
+                200, headers={"ETag": '"v1"'}, content=artist_json(request)
+            )
+
+        disk_cache = DiskCache(tmp_path / "cache.db")
+        threads = []
+        get = disk_cache.get
+        mocker.patch.object(
+            disk_cache,
+            "get",
+            lambda request: threads.append(threading.current_thread()) or get(request),
+        )
+        http_session = HttpSession(
+            client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+            disk_cache=disk_cache,
+        )
+
+        async def send_twice() -> tuple:
+            return (
+                await http_session.send(stateless_artist_builder(1)),
+                await http_session.send(stateless_artist_builder(1)),
+            )
+
+        first, second = asyncio.run(send_twice())
+
+        assert first == second
+        assert conditions == [None, '"v1"']
+        assert threading.main_thread() not in threads
+
+    def test_download_streams_body_into_file(self):
+        async def body():
+            for chunk in [b"a" * 1000, b"b"]:
+                yield chunk
+
+        http_session = HttpSession(
+            client=httpx.AsyncClient(
+                transport=httpx.MockTransport(
+                    lambda _: httpx.Response(200, content=body())
+                )
+            ),
+        )
+        file = io.BytesIO()
+
+        written = asyncio.run(
+            http_session.download(stateless_artist_builder(1).build(), file)
+        )
+
+        assert written == 1001
+        assert file.getvalue() == b"a" * 1000 + b"b"
+
+
+class TestSession:
+    def test_send_many_returns_results_in_order(self):
+        session = make_session(
+            lambda request: httpx.Response(200, content=artist_json(request))
+        )
+
+        artists = asyncio.run(
+            session.send_many([artist_builder(i) for i in range(20)], 5)
+        )
+
+        assert [artist.id for artist in artists] == list(range(20))
+
+    @pytest.mark.parametrize("max_concurrency", [0, -1])
+    def test_send_many_needs_some_concurrency(self, max_concurrency):
+        session = make_session(lambda _: pytest.fail("nothing should be sent"))
+
+        with pytest.raises(ValueError, match="max_concurrency"):
+            asyncio.run(session.send_many([artist_builder(1)], max_concurrency))
+
+    def test_send_many_bounds_concurrency(self):
+        in_flight = 0
+        peak = 0
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, content=artist_json(request))
+
+        session = make_session(handler)
+
+        asyncio.run(session.send_many([artist_builder(i) for i in range(20)], 3))
+
+        assert peak == 3
+
+    def test_expired_token_refreshed_once_for_concurrent_requests(self):
+        refreshes = 0
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal refreshes
+            if str(request.url) == TOKEN_URL:
+                refreshes += 1
+                await asyncio.sleep(0.01)
+                return httpx.Response(200, content=token_json("new"))
+            assert request.headers["authorization"] == "Bearer new"
+            return httpx.Response(200, content=artist_json(request))
+
+        session = make_session(handler, expires_at=datetime.now(timezone.utc))
+
+        asyncio.run(session.send_many([artist_builder(i) for i in range(10)]))
+
+        assert refreshes == 1
+        assert session.api_session.access_token.access_token == "new"
+
+    def test_unauthorised_response_refreshes_and_resends(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            if str(request.url) == TOKEN_URL:
+                return httpx.Response(200, content=token_json("new"))
+            if request.headers["authorization"] == "Bearer old":
+                return httpx.Response(401, request=request)
+            return httpx.Response(200, content=artist_json(request))
+
+        session = make_session(handler)
+
+        artist = asyncio.run(session.send(artist_builder(7)))
+
+        assert artist.id == 7
+        assert session.api_session.access_token.access_token == "new"
+
+    def test_paginate_walks_every_page(self):
+        album = AlbumFactory().build(id=1)
+        offsets = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            offsets.append(int(request.url.params["offset"]))
+            return httpx.Response(200, content=tracks_page(request, 25))
+
+        session = make_session(handler)
+
+        async def collect() -> list:
+            return [track async for track in session.paginate(album.tracks, 10)]
+
+        tracks = asyncio.run(collect())
+
+        assert [track.id for track in tracks] == list(range(25))
+        assert offsets == [0, 10, 20]
+
+    def test_paginate_prefetches_next_page(self):
+        album = AlbumFactory().build(id=1)
+        offsets = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            offsets.append(int(request.url.params["offset"]))
+            return httpx.Response(200, content=tracks_page(request, 30))
+
+        session = make_session(handler)
+
+        async def first() -> None:
+            tracks = session.paginate(album.tracks, 10)
+            await anext(tracks)
+            await asyncio.sleep(0)
+            await tracks.aclose()
+
+        asyncio.run(first())
+
+        assert offsets == [0, 10]
+
+    def test_paginate_fans_out_once_total_known(self):
+        album = AlbumFactory().build(id=1)
+        in_flight = 0
+        peak = 0
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, content=tracks_page(request, 100))
+
+        session = make_session(handler)
+
+        async def collect() -> list:
+            tracks = session.paginate(album.tracks, 10, max_concurrency=4)
+            return [track async for track in tracks]
+
+        tracks = asyncio.run(collect())
+
+        assert [track.id for track in tracks] == list(range(100))
+        assert peak == 4
+
+    def test_paginate_needs_some_concurrency(self):
+        album = AlbumFactory().build(id=1)
+        session = make_session(lambda _: pytest.fail("nothing should be sent"))
+
+        async def first() -> None:
+            await anext(session.paginate(album.tracks, 10, max_concurrency=0))
+
+        with pytest.raises(ValueError, match="max_concurrency"):
+            asyncio.run(first())
+
+    def test_cached_responses_not_refetched(self):
+        calls = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal calls
+            calls += 1
+            return httpx.Response(200, content=artist_json(request))
+
+        session = make_session(handler)
+        session.http_session.cache = MemoryCache()
+
+        async def send_twice() -> tuple:
+            return (
+                await session.send(artist_builder(1)),
+                await session.send(artist_builder(1)),
+            )
+
+        first, second = asyncio.run(send_twice())
+
+        assert first is second
+        assert calls == 1
+
+    def test_identical_responses_share_one_parse(self):
+        # Every artist looked up comes back the same.
+        artist = httpx.Request("GET", "https://api.tidal.com/v1/artists/1")
+        session = make_session(
+            lambda _: httpx.Response(200, content=artist_json(artist))
+        )
+        session.http_session.parse_memo = ParseMemo()
+
+        async def send_both() -> tuple:
+            return (
+                await session.send(artist_builder(1)),
+                await session.send(artist_builder(2)),
+            )
+
+        first, second = asyncio.run(send_both())
+
+        assert first is second
+
+    def test_single_flight_coalesces_concurrent_identical_requests(self):
+        calls = 0
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return httpx.Response(200, content=artist_json(request))
+
+        session = make_session(handler)
+        session.http_session.single_flight = AsyncSingleFlight()
+
+        artists = asyncio.run(session.send_many([artist_builder(1)] * 5))
+
+        assert {artist.id for artist in artists} == {1}
+        assert calls == 1
+        assert session.http_session.single_flight.stats.coalesced == 4
+
+    def test_tokens_shorter_than_margin_not_refreshed_straight_away(self):
+        refreshes = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal refreshes
+            if str(request.url) == TOKEN_URL:
+                refreshes += 1
+                return httpx.Response(200, content=token_json("new", expires_in=60))
+            return httpx.Response(200, content=artist_json(request))
+
+        session = make_session(handler, datetime.now(timezone.utc))
+
+        async def run() -> None:
+            async with session:
+                await session.send(artist_builder(1))
+                await asyncio.sleep(0.2)
+
+        asyncio.run(run())
+
+        assert refreshes == 1
+
+    def test_token_refreshed_in_background_before_expiry(self):
+        tokens = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if str(request.url) == TOKEN_URL:
+                return httpx.Response(200, content=token_json("new"))
+            tokens.append(request.headers["authorization"])
+            return httpx.Response(200, content=artist_json(request))
+
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=5, seconds=0.05)
+        session = make_session(handler, expires_at)
+
+        async def run() -> None:
+            async with session:
+                await session.send(artist_builder(1))
+                await asyncio.sleep(0.1)
+                await session.send(artist_builder(1))
+
+        asyncio.run(run())
+
+        assert tokens == ["Bearer old", "Bearer new"]
+
+    def test_timeout_bounds_whole_call(self):
+        async def handler(request: httpx.Request) -> httpx.Response:
+            await asyncio.sleep(1)
+            return httpx.Response(200, content=artist_json(request))
+
+        session = make_session(handler)
+
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            asyncio.run(session.send(artist_builder(1), timeout=0.05))
+
+        assert time.monotonic() - start < 0.5
+
+    def test_caller_deadlines_do_not_open_circuit(self):
+        calls = 0
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(1)
+            return httpx.Response(200, content=artist_json(request))
+
+        session = make_session(handler)
+        session.http_session.circuit_breaker = CircuitBreaker(min_requests=2)
+
+        async def send_ten() -> None:
+            for _ in range(10):
+                with pytest.raises(DeadlineExceeded):
+                    await session.send(artist_builder(1), timeout=0.01)
+
+        asyncio.run(send_ten())
+
+        assert calls == 10
+
+    def test_abandoned_paginate_does_not_open_circuit(self):
+        album = AlbumFactory().build(id=1)
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.params["offset"] != "0":
+                await asyncio.sleep(1)
+            return httpx.Response(200, content=tracks_page(request, 200))
+
+        session = make_session(handler)
+        session.http_session.circuit_breaker = CircuitBreaker(min_requests=2)
+
+        async def first_twice() -> None:
+            for _ in range(2):
+                tracks = session.paginate(album.tracks, 10, max_concurrency=12)
+                assert (await anext(tracks)).id == 0
+                # The remaining pages are in flight when they are abandoned.
+                await asyncio.sleep(0.01)
+                await tracks.aclose()
+                await asyncio.sleep(0.01)
+
+        asyncio.run(first_twice())
+
+    def test_token_store_held_elsewhere_bounded_by_deadline(self, tmp_path):
+        def handler(request: httpx.Request) -> httpx.Response:
+            if str(request.url) == TOKEN_URL:
+                return httpx.Response(200, content=token_json("new"))
+            return httpx.Response(200, content=artist_json(request))
+
+        store = TokenStore(tmp_path / "session.json")
+        session = Session(
+            api_session(datetime.now(timezone.utc)),
+            HttpSession(
+                client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            ),
+            token_store=store,
+        )
+
+        async def send_twice() -> int:
+            with open(store.lock_path, "a") as held:
+                fcntl.flock(held, fcntl.LOCK_EX)
+                with pytest.raises(DeadlineExceeded):
+                    await session.send(artist_builder(1), timeout=0.1)
+            await asyncio.sleep(0.1)
+            # The lock was given up on, not taken late and kept.
+            assert store.acquire(timeout=0)
+            store.release()
+            return (await session.send(artist_builder(1), timeout=1)).id
+
+        assert asyncio.run(send_twice()) == 1
+
+    def test_retry_after_beyond_deadline_fails_fast(self):
+        session = make_session(
+            lambda _: httpx.Response(429, headers={"Retry-After": "30"})
+        )
+        session.timeout = 1
+
+        with pytest.raises(DeadlineExceeded):
+            asyncio.run(session.send(artist_builder(1)))
+
+    def test_stream_deadline_does_not_count_time_spent_on_items(self):
+        album = AlbumFactory().build(id=1)
+
+        async def body():
+            for chunk in [b'{"items": [{"id": 0}, ', b'{"id": 1}, ', b'{"id": 2}]}']:
+                yield chunk
+
+        session = make_session(lambda _: httpx.Response(200, content=body()))
+
+        async def collect() -> list:
+            ids = []
+            tracks = session.stream(album.tracks(10).streamed(), timeout=0.05)
+            async for track in tracks:
+                ids.append(track.id)
+                await asyncio.sleep(0.05)
+            return ids
+
+        assert asyncio.run(collect()) == [0, 1, 2]
+
+    def test_stream_refreshes_token_and_yields_items(self):
+        album = AlbumFactory().build(id=1)
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if str(request.url) == TOKEN_URL:
+                return httpx.Response(200, content=token_json("new"))
+            if request.headers["authorization"] == "Bearer old":
+                return httpx.Response(401, request=request)
+            return httpx.Response(200, content=tracks_page(request, 3))
+
+        session = make_session(handler)
+
+        async def collect() -> list:
+            tracks = session.stream(album.tracks(10).streamed())
+            return [track async for track in tracks]
+
+        assert [track.id for track in asyncio.run(collect())] == [0, 1, 2]
@@ -2,7 +2,7 @@ from pytest_cases import parametrize, parametrize_with_cases
 
 from littoral.models import Album, ImageSize
 from littoral.request import Request
-from littoral.testing import AlbumFactory, ApiSessionFactory
+from littoral.testing import AlbumFactory, ApiSessionFactory, override_urls
 from tests.cases_album import AlbumCase
 from tests.conftest import CheckModelsList, CompareModels
 
@@ -101,3 +101,22 @@ def test_track_requests_constructed_from_id_offset_and_limit(
 
     assert request.url == expected.url
     assert request.params.items() >= {"limit": limit, "offset": offset}.items()
+
+
+def test_requests_built_against_overridden_urls():
+    album = AlbumFactory().build(id=123)
+
+    with override_urls(api_v1="http://localhost:8000/v1"):
+        request = album.tracks(10).build(ApiSessionFactory().build())
+
+    assert str(request.url) == "http://localhost:8000/v1/albums/123/tracks"
+    assert str(album.tracks(10).build(ApiSessionFactory().build()).url) == (
+        "https://api.tidal.com/v1/albums/123/tracks"
+    )
+
+
+def test_urls_shared_rather_than_stored_per_album():
+    first, second = AlbumFactory().batch(2)
+
+    assert first.urls is second.urls
+    assert "urls" not in first.model_dump()
@@ -0,0 +1,242 @@
+from datetime import timedelta
+
+import pytest
+from pydantic import ValidationError
+
+from littoral.auth.models import AccessToken
+from littoral.cache import MISSING, DiskCache, MemoryCache, ParseMemo, cache_key
+from littoral.models import Artist
+from littoral.parsers import parser, projection
+from littoral.request import Request, Response
+from littoral.testing import ApiSessionFactory
+from tests.http import artist_builder, token_json
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+API_SESSION = ApiSessionFactory().build()
+
+
+def request(id: int = 1, **kwargs) -> Request:
+    return artist_builder(id).build(API_SESSION).model_copy(update=kwargs)
+
+
+class TestCacheKey:
+    def test_ignores_param_order_and_credentials(self):
+        a = Request(
+            url="https://example.com",  # type: ignore
+            params={"a": 1, "b": 2, "sessionId": "one"},
+            headers={"Authorization": "Bearer one", "Accept": "json"},
+        )
+        b = Request(
+            url="https://example.com",  # type: ignore
+            params={"b": 2, "a": 1, "sessionId": "two"},
+            headers={"accept": "json", "authorization": "Bearer two"},
+        )
+
+        assert cache_key(a) == cache_key(b)
+
+    def test_distinguishes_method_url_and_params(self):
+        base = Request(url="https://example.com", params={"a": 1})  # type: ignore
+
+        assert cache_key(base) != cache_key(base.model_copy(update={"method": "PUT"}))
+        assert cache_key(base) != cache_key(base.model_copy(update={"params": {}}))
+        assert cache_key(base) != cache_key(
+            Request(url="https://example.org", params={"a": 1})  # type: ignore
+        )
+
+
+class TestMemoryCache:
+    def test_miss_then_hit(self):
+        cache = MemoryCache()
+        builder = artist_builder(1)
+
+        assert cache.get(request(), builder) is MISSING
+        cache.put(request(), builder, "value")
+
+        assert cache.get(request(), builder) == "value"
+        assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+        assert cache.stats.hit_rate == 0.5
+
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        cache = MemoryCache(default_ttl=timedelta(seconds=10), clock=clock)
+        builder = artist_builder(1)
+        cache.put(request(), builder, "value")
+
+        clock.now += 9
+        assert cache.get(request(), builder) == "value"
+        clock.now += 1
+        assert cache.get(request(), builder) is MISSING
+
+    def test_longest_matching_prefix_sets_ttl(self):
+        cache = MemoryCache(
+            ttls={
+                "https://api.tidal.com/v1": timedelta(minutes=1),
+                "https://api.tidal.com/v1/artists": timedelta(hours=1),
+                "https://api.tidal.com/v1/artists/2": timedelta(0),
+            }
+        )
+
+        assert cache.ttl(request(1)) == timedelta(hours=1)
+        assert cache.ttl(Request(url="https://api.tidal.com/v1/albums")) == timedelta(  # type: ignore
+            minutes=1
+        )
+        assert cache.ttl(Request(url="https://example.com")) == cache.default_ttl  # type: ignore
+
+    def test_zero_ttl_and_non_get_requests_are_not_cached(self):
+        cache = MemoryCache(ttls={"https://api.tidal.com/v1/artists/2": timedelta(0)})
+        builder = artist_builder(1)
+        cache.put(request(2), builder, "value")
+        cache.put(request(method="POST"), builder, "value")
+
+        assert len(cache) == 0
+        assert cache.get(request(2), builder) is MISSING
+        assert cache.stats.misses == 0
+
+    def test_different_parsers_are_different_entries(self):
+        cache = MemoryCache()
+        cache.put(request(), artist_builder(1), "value")
+
+        assert cache.get(request(), artist_builder(1)) == "value"
+        assert cache.get(request(), type(artist_builder(1))(str, request())) is MISSING
+
+    def test_least_recently_used_evicted_when_full(self):
+        cache = MemoryCache(max_entries=2)
+        builder = artist_builder(1)
+        cache.put(request(1), builder, 1)
+        cache.put(request(2), builder, 2)
+        cache.get(request(1), builder)
+        cache.put(request(3), builder, 3)
+
+        assert cache.get(request(2), builder) is MISSING
+        assert cache.get(request(1), builder) == 1
+        assert cache.get(request(3), builder) == 3
+        assert cache.stats.evictions == 1
+
+    def test_clear_removes_entries(self):
+        cache = MemoryCache()
+        cache.put(request(), artist_builder(1), "value")
+
+        cache.clear()
+
+        assert len(cache) == 0
+
+
+def artist(id: int) -> bytes:
+    return f'{{"id": {id}, "name": "artist", "picture": null}}'.encode()
+
+
+class TestParseMemo:
+    def test_identical_data_parsed_once(self):
+        memo = ParseMemo()
+        parser = Artist.model_validate_json
+
+        first = memo.parse(parser, artist(1))
+        second = memo.parse(parser, bytes(bytearray(artist(1))))
+
+        assert first is second
+        assert (memo.stats.hits, memo.stats.misses) == (1, 1)
+
+    def test_memoised_results_are_frozen(self):
+        shared = ParseMemo().parse(Artist.model_validate_json, artist(1))
+
+        with pytest.raises(ValidationError):
+            shared.name = "changed"  # type: ignore[misc]
+
+    def test_different_data_and_parsers_are_different_entries(self):
+        memo = ParseMemo()
+
+        assert memo.parse(Artist.model_validate_json, artist(1)).id == 1
+        assert memo.parse(Artist.model_validate_json, artist(2)).id == 2
+        assert memo.parse(projection(Artist, "id").model_validate_json, artist(1))
+        assert memo.stats.hits == 0
+
+    @pytest.mark.parametrize(
+        "parse, data",
+        [
+            (AccessToken.model_validate_json, token_json("token")),
+            (parser(list[Artist]), b"[" + artist(1) + b"]"),
+            (int, b"1"),
+        ],
+    )
+    def test_only_frozen_models_memoised(self, parse, data):
+        memo = ParseMemo()
+
+        memo.parse(parse, data)
+        memo.parse(parse, data)
+
+        assert len(memo) == 0
+        assert (memo.stats.hits, memo.stats.misses) == (0, 0)
+
+    def test_least_recently_used_evicted_when_full(self):
+        memo = ParseMemo(max_entries=2)
+        for id in (1, 2, 1, 3):
+            memo.parse(Artist.model_validate_json, artist(id))
+
+        assert memo.stats.evictions == 1
+        memo.parse(Artist.model_validate_json, artist(1))
+        memo.parse(Artist.model_validate_json, artist(2))
+        assert memo.stats.hits == 2
+        assert memo.stats.misses == 4
+
+    def test_clear_removes_entries(self):
+        memo = ParseMemo()
+        memo.parse(Artist.model_validate_json, artist(1))
+
+        memo.clear()
+
+        assert len(memo) == 0
+
+
+def response(**headers: str) -> Response:
+    return Response(
+        status_code=200,
+        url="https://api.tidal.com/v1/artists/1",  # type: ignore
+        headers=headers,
+        data=b"body",
+    )
+
+
+class TestDiskCache:
+    def test_stored_responses_survive_reopening(self, tmp_path):
+        cache = DiskCache(tmp_path / "cache.db")
+        cache.put(request(), response(ETag='"abc"'))
+        cache.close()
+
+        stored = DiskCache(tmp_path / "cache.db").get(request())
+
+        assert stored == response(etag='"abc"')
+
+    def test_responses_without_validators_not_stored(self, tmp_path):
+        cache = DiskCache(tmp_path / "cache.db")
+        cache.put(request(), response())
+
+        assert cache.get(request()) is None
+
+    def test_non_get_requests_not_stored(self, tmp_path):
+        cache = DiskCache(tmp_path / "cache.db")
+        cache.put(request(method="POST"), response(etag='"abc"'))
+
+        assert cache.get(request()) is None
+        assert cache.get(request(method="POST")) is None
+
+    def test_conditional_request_carries_validators(self):
+        stored = response(etag='"abc"', **{"last-modified": "yesterday"})
+
+        conditional = DiskCache.conditional(request(), stored)
+
+        assert (
+            conditional.headers.items()
+            >= {
+                "If-None-Match": '"abc"',
+                "If-Modified-Since": "yesterday",
+            }.items()
+        )
+        assert "If-None-Match" not in request().headers
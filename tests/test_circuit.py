@@ -0,0 +1,120 @@
+from littoral.circuit import CircuitBreaker, CircuitState
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def breaker(**kwargs) -> CircuitBreaker:
+    kwargs = {"min_requests": 4, "window": 4, "reset_timeout": 10} | kwargs
+    return CircuitBreaker(**kwargs)
+
+
+def fail(breaker: CircuitBreaker, host: str, times: int) -> None:
+    for _ in range(times):
+        assert breaker.allow(host)
+        breaker.record(host, False)
+
+
+def test_opens_once_failure_ratio_reached():
+    circuits = breaker(failure_ratio=0.5)
+    circuits.record("a", True)
+    circuits.record("a", True)
+    fail(circuits, "a", 1)
+    assert circuits.state("a") is CircuitState.CLOSED
+
+    fail(circuits, "a", 1)
+
+    assert circuits.state("a") is CircuitState.OPEN
+    assert not circuits.allow("a")
+
+
+def test_needs_min_requests_before_opening():
+    circuits = breaker(min_requests=5)
+
+    fail(circuits, "a", 4)
+
+    assert circuits.state("a") is CircuitState.CLOSED
+
+
+def test_slow_calls_count_as_failures():
+    circuits = breaker(slow_call=1.0)
+
+    for _ in range(4):
+        circuits.record("a", True, latency=2.0)
+
+    assert circuits.state("a") is CircuitState.OPEN
+
+
+def test_hosts_are_independent():
+    circuits = breaker()
+
+    fail(circuits, "a", 4)
+
+    assert circuits.allow("b")
+
+
+def test_half_open_after_reset_timeout_allows_limited_probes():
+    clock = FakeClock()
+    circuits = breaker(clock=clock, probes=1)
+    fail(circuits, "a", 4)
+
+    clock.now += 10
+
+    assert circuits.allow("a")
+    assert circuits.state("a") is CircuitState.HALF_OPEN
+    assert not circuits.allow("a")
+
+
+def test_released_probe_lets_another_through():
+    clock = FakeClock()
+    circuits = breaker(clock=clock, probes=1)
+    fail(circuits, "a", 4)
+    clock.now += 10
+    assert circuits.allow("a")
+
+    circuits.release("a")
+
+    assert circuits.state("a") is CircuitState.HALF_OPEN
+    assert circuits.allow("a")
+
+
+def test_released_requests_are_not_counted():
+    circuits = breaker()
+    for _ in range(4):
+        assert circuits.allow("a")
+        circuits.release("a")
+
+    fail(circuits, "a", 3)
+
+    assert circuits.state("a") is CircuitState.CLOSED
+
+
+def test_successful_probe_closes_circuit():
+    clock = FakeClock()
+    circuits = breaker(clock=clock)
+    fail(circuits, "a", 4)
+    clock.now += 10
+
+    assert circuits.allow("a")
+    circuits.record("a", True)
+
+    assert circuits.state("a") is CircuitState.CLOSED
+    assert circuits.allow("a")
+
+
+def test_failed_probe_reopens_circuit():
+    clock = FakeClock()
+    circuits = breaker(clock=clock)
+    fail(circuits, "a", 4)
+    clock.now += 10
+
+    fail(circuits, "a", 1)
+
+    assert circuits.state("a") is CircuitState.OPEN
+    clock.now += 5
+    assert not circuits.allow("a")
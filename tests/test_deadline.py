@@ -0,0 +1,38 @@
+import time
+
+import pytest
+
+from littoral.deadline import Deadline, DeadlineExceeded
+
+
+def test_remaining_counts_down_to_zero():
+    deadline = Deadline.after(0.01)
+    assert 0 < deadline.remaining() <= 0.01
+
+    time.sleep(0.02)
+
+    assert deadline.remaining() == 0
+    with pytest.raises(DeadlineExceeded):
+        deadline.check()
+
+
+def test_check_wait_refuses_waits_past_deadline():
+    deadline = Deadline.after(10)
+    deadline.check_wait(1)
+
+    with pytest.raises(DeadlineExceeded):
+        deadline.check_wait(20)
+
+
+def test_clip_caps_timeouts_at_remaining_time():
+    deadline = Deadline.after(2)
+
+    clipped = deadline.clip({"connect": 1, "read": 5, "pool": None})
+
+    assert clipped["connect"] == 1
+    assert 1.9 < clipped["read"] <= 2
+    assert clipped["pool"] == clipped["read"]
+
+
+def test_deadline_exceeded_is_a_timeout():
+    assert issubclass(DeadlineExceeded, TimeoutError)
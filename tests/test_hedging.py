@@ -0,0 +1,49 @@
+from littoral.hedging import HedgingPolicy
+
+
+def test_initial_delay_used_until_enough_samples():
+    policy = HedgingPolicy(initial_delay=2, min_samples=3)
+    policy.record(0.1)
+    policy.record(0.1)
+
+    assert policy.delay() == 2
+
+
+def test_delay_is_percentile_of_recent_latencies():
+    policy = HedgingPolicy(percentile=0.9, min_samples=1, window=10)
+    for latency in range(100):
+        policy.record(latency / 100)
+
+    assert policy.delay() == 0.99
+
+
+def test_delay_has_floor():
+    policy = HedgingPolicy(min_delay=0.5, min_samples=1)
+    policy.record(0.001)
+
+    assert policy.delay() == 0.5
+
+
+def test_hedges_limited_to_budget():
+    policy = HedgingPolicy(budget=0.1)
+
+    allowed = []
+    for _ in range(100):
+        policy.delay()
+        allowed.append(policy.should_hedge())
+
+    assert sum(allowed) == 10
+    assert policy.hedges == 10
+    assert not allowed[0]
+
+
+def test_may_hedge_does_not_count_a_hedge():
+    policy = HedgingPolicy(budget=0.5)
+    policy.delay()
+    policy.delay()
+
+    assert policy.may_hedge()
+    assert policy.may_hedge()
+    assert policy.hedges == 0
+    assert policy.should_hedge()
+    assert not policy.may_hedge()
@@ -0,0 +1,47 @@
+import subprocess
+import sys
+
+import pytest
+from pydantic import ValidationError
+from pytest_cases import parametrize
+
+from littoral.auth import client_oauth2
+from littoral.auth.models import Session
+
+
+def imported_after(statement: str) -> set[str]:
+    """The modules imported by running ``statement`` in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-c", f"{statement}; import sys; print(*sys.modules)"],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return set(result.stdout.split())
+
+
+@parametrize("module", ["littoral.sync", "littoral.aio"])
+def test_slow_dependencies_not_imported_up_front(module):
+    imported = imported_after(f"import {module}")
+
+    assert "pycountry" not in imported
+    assert "structlog" not in imported
+
+
+def test_models_not_built_at_import():
+    imported = imported_after(
+        "import littoral.sync; from littoral.models import Album; "
+        "assert not Album.__pydantic_complete__"
+    )
+
+    assert "littoral.models" in imported
+
+
+def test_country_validated_on_first_use():
+    assert Session(countryCode="GB", sessionId="1").country == "GB"
+    with pytest.raises(ValidationError):
+        Session(countryCode="XX", sessionId="1")
+
+
+def test_default_client_config_available_as_attribute():
+    assert client_oauth2.android_client_config == client_oauth2.default_client_config()
@@ -11,6 +11,7 @@ from littoral.testing import (
     OauthFlowFactory,
     ResponseFactory,
     SessionFactory,
+    override_urls,
 )
 from tests.conftest import CompareModels
 
@@ -31,6 +32,19 @@ class TestAuthRequest:
             ),
         )
 
+    def test_auth_endpoints_follow_overridden_urls(self):
+        client = ClientConfigFactory().build()
+
+        with override_urls(
+            oauth2="http://localhost:8000/token",
+            device_authorization="http://localhost:8000/device",
+        ):
+            flow_request = auth_request(client).build()
+            user_request = OauthFlowFactory().build().user(client).build()
+
+        assert str(flow_request.url) == "http://localhost:8000/device"
+        assert str(user_request.url) == "http://localhost:8000/token"
+
     def test_parses_to_oauth_flow(self, compare_models: CompareModels):
         flow = OauthFlowFactory().build()
         json = flow.model_dump_json(by_alias=True)
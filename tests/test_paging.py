@@ -0,0 +1,65 @@
+from pytest_cases import parametrize
+
+from littoral.models import Track
+from littoral.paging import Page
+from littoral.testing import AlbumFactory, ApiSessionFactory, ResponseFactory
+
+
+@parametrize(
+    "limit, offset, total, expected",
+    [
+        (10, 0, 25, [10, 20]),
+        (10, 10, 25, [20]),
+        (10, 20, 25, []),
+        (10, 0, 30, [10, 20]),
+        (10, 0, 0, []),
+        (0, 0, 25, []),
+    ],
+)
+def test_remaining_offsets_step_by_limit_until_total(limit, offset, total, expected):
+    page = Page[Track](limit=limit, offset=offset, total=total, items=[])
+
+    assert list(page.remaining_offsets()) == expected
+
+
+def test_remaining_offsets_follow_items_capped_below_limit():
+    page = Page[Track](
+        limit=10, offset=0, total=12, items=[Track(id=i) for i in range(4)]
+    )
+
+    assert list(page.remaining_offsets()) == [4, 8]
+
+
+def test_album_tracks_parses_to_page():
+    builder = AlbumFactory().build(id=123).tracks(2, 4)
+    raw = b'{"limit": 2, "offset": 4, "totalNumberOfItems": 9, "items": [{"id": 5}]}'
+
+    page = builder.parse(ResponseFactory().build(data=raw))
+
+    assert page == Page[Track](limit=2, offset=4, total=9, items=[Track(id=5)])
+    assert (
+        builder.build(ApiSessionFactory().build()).params.items()
+        >= {
+            "limit": 2,
+            "offset": 4,
+        }.items()
+    )
+
+
+def test_streamed_page_parses_items_from_chunks():
+    builder = AlbumFactory().build(id=123).items(2, 4).streamed()
+    raw = b'{"items": [{"id": 5, "type": "x"}, {"id": 6}], "totalNumberOfItems": 9}'
+
+    items = list(builder.items_parser.iter([raw[:20], raw[20:]]))
+
+    assert [item.id for item in items] == [5, 6]
+
+
+def test_only_parses_items_with_just_those_fields():
+    builder = AlbumFactory().build(id=123).tracks(2, 4).only("id")
+    raw = b'{"limit": 2, "offset": 4, "totalNumberOfItems": 9, "items": [{"id": 5}]}'
+
+    page = builder.parse(ResponseFactory().build(data=raw))
+
+    assert [item.model_dump() for item in page.items] == [{"id": 5}]
+    assert not isinstance(page.items[0], Track)
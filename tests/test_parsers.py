@@ -0,0 +1,76 @@
+from typing import get_args
+
+import pytest
+from pytest_cases import parametrize
+
+import littoral
+from littoral import parsers
+from littoral.auth.client_oauth2 import SimpleOauthFlow
+from littoral.models import Album, Track, Video
+from littoral.paging import Page
+from littoral.testing import AlbumFactory
+
+
+def test_adapters_built_once_and_shared():
+    assert parsers.adapter(list[Track]) is parsers.adapter(list[Track])
+
+
+def test_parsers_for_same_type_compare_equal():
+    assert parsers.parser(Track | Video) == parsers.parser(Track | Video)
+    assert parsers.parser(Page[Track]) == Page[Track].model_validate_json
+
+
+def test_page_builders_share_parsers(mocker):
+    first = AlbumFactory().build().items().streamed()
+    adapter = mocker.spy(parsers, "TypeAdapter")
+
+    second = AlbumFactory().build().items().streamed()
+
+    assert first.parser == second.parser
+    adapter.assert_not_called()
+
+
+def test_warm_up_exported_from_package():
+    assert littoral.warm_up is parsers.warm_up
+
+
+def test_warm_up_builds_models_and_registered_adapters(mocker):
+    parsers.register(list[Video])
+    rebuild = mocker.spy(parsers.TypeAdapter, "rebuild")
+
+    littoral.warm_up()
+
+    assert rebuild.call_count == len(parsers._adapters)
+    assert Track.__pydantic_complete__
+
+
+def test_projection_keeps_only_fields_and_aliases():
+    Projected = parsers.projection(Album, "id", "cover_uuid")
+    raw = AlbumFactory().build(id=3, cover_uuid="a-b").model_dump_json(by_alias=True)
+
+    projected = Projected.model_validate_json(raw)
+
+    assert projected.model_dump() == {"id": 3, "cover_uuid": "a-b"}
+    assert parsers.projection(Album, "id", "cover_uuid") is Projected
+
+
+def test_projection_of_union_projects_each_model():
+    projected = parsers.projection(Track | Video, "id")
+
+    assert [list(model.model_fields) for model in get_args(projected)] == [
+        ["id"],
+        ["id"],
+    ]
+
+
+@parametrize(
+    "type_, fields, error",
+    [
+        (Album, ("id", "nope"), ValueError),
+        (list[Album], ("id",), TypeError),
+        (SimpleOauthFlow, ("device_code",), TypeError),
+    ],
+)
+def test_projection_rejects_what_it_cannot_project(type_, fields, error):
+    with pytest.raises(error):
+        parsers.projection(type_, *fields)
@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from pytest_cases import parametrize
+
+from littoral.ratelimit import RateLimiter, TokenBucket, retry_after
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@parametrize(
+    "headers, expected",
+    [
+        ({}, None),
+        ({"Retry-After": "3"}, 3.0),
+        ({"retry-after": "1.5"}, 1.5),
+        ({"retry-after": "-1"}, 0.0),
+        ({"retry-after": "soon"}, None),
+    ],
+)
+def test_retry_after_parses_seconds(headers, expected):
+    assert retry_after(headers) == expected
+
+
+def test_retry_after_parses_http_dates():
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+
+    delay = retry_after({"Retry-After": format_datetime(when, usegmt=True)})
+
+    assert delay is not None
+    assert 28 < delay <= 30
+
+
+class TestTokenBucket:
+    def test_burst_then_paced_reservations(self):
+        bucket = TokenBucket(rate=2, capacity=2, tokens=2, updated=0)
+
+        waits = [bucket.reserve(0) for _ in range(4)]
+
+        assert waits == [0, 0, 0.5, 1.0]
+
+    def test_refills_over_time_up_to_capacity(self):
+        bucket = TokenBucket(rate=2, capacity=2, tokens=0, updated=0)
+
+        assert bucket.reserve(10) == 0
+        assert bucket.tokens == 1
+
+
+class TestRateLimiter:
+    def test_successes_increase_rate_additively(self):
+        limiter = RateLimiter(initial_rate=10, increase=1)
+
+        for _ in range(10):
+            limiter.record("host", 200, {})
+
+        assert 10.9 < limiter.rate("host") < 11
+
+    def test_rate_capped(self):
+        limiter = RateLimiter(initial_rate=10, max_rate=10)
+        limiter.record("host", 200, {})
+
+        assert limiter.rate("host") == 10
+
+    def test_too_many_requests_decreases_rate_once_per_cooldown(self):
+        clock = FakeClock()
+        limiter = RateLimiter(initial_rate=10, decrease=0.5, cooldown=1, clock=clock)
+
+        limiter.record("host", 429, {})
+        limiter.record("host", 429, {})
+        assert limiter.rate("host") == 5
+
+        clock.now += 1
+        limiter.record("host", 429, {})
+        assert limiter.rate("host") == 2.5
+
+    def test_rate_never_below_minimum(self):
+        limiter = RateLimiter(initial_rate=1, min_rate=0.8, cooldown=0)
+
+        limiter.record("host", 429, {})
+
+        assert limiter.rate("host") == 0.8
+
+    def test_retry_after_blocks_host(self):
+        clock = FakeClock()
+        limiter = RateLimiter(clock=clock)
+
+        limiter.record("host", 429, {"Retry-After": "5"})
+
+        assert limiter.acquire("host") == 5
+        assert limiter.acquire("other") == 0
+
+    def test_hosts_limited_independently(self):
+        limiter = RateLimiter(initial_rate=1, burst=1, clock=FakeClock())
+
+        assert limiter.acquire("a") == 0
+        assert limiter.acquire("b") == 0
+        assert limiter.acquire("a") == 1
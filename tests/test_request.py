@@ -1,10 +1,14 @@
 import httpx
+import pytest
 from pydantic import BaseModel
+from pytest_cases import parametrize
 
 from littoral.auth.models import Session
+from littoral.models import Album
 from littoral.request import Request, RequestBuilder, Response
 from littoral.testing import (
     AccessTokenFactory,
+    AlbumFactory,
     ApiSessionFactory,
     RequestFactory,
     ResponseFactory,
@@ -45,6 +49,22 @@ class TestRequest:
         assert cast.url == constructed.url
         assert cast.headers == constructed.headers
 
+    @parametrize(
+        "url, params",
+        [
+            ("http://example.com/", {"q": "hard day's night & co/é", "limit": 10}),
+            ("http://example.com/", {"flag": True, "off": False, "none": None}),
+            ("http://example.com/", {"ids": [1, 2]}),
+            ("http://example.com/?a=1", {"b": 2}),
+        ],
+    )
+    def test_params_encoded_as_httpx_would(self, url, params):
+        constructed = httpx.Request(method="GET", url=url, params=params)
+
+        cast = Request(method="GET", url=url, params=params).to_httpx()
+
+        assert cast.url == constructed.url
+
 
 class TestResponse:
     def test_constructable_from_httpx_response(self, compare_models):
@@ -62,6 +82,7 @@ class TestResponse:
         )
 
         compare_models(expected, Response.from_httpx(httpx_response))
+        assert expected == Response.from_httpx(httpx_response)
 
 
 class TestRequestBuilder:
@@ -91,6 +112,38 @@ class TestRequestBuilder:
         )
         compare_models(built, expected)
 
+    def test_rebuilt_only_when_token_replaced(self, mocker):
+        session = ApiSessionFactory().build()
+        builder = RequestBuilder.from_model(
+            mocker.Mock(spec=BaseModel), RequestFactory().build()
+        )
+        built = builder.build(session)
+        assert builder.build(session) is built
+
+        session.access_token = AccessTokenFactory.build(
+            access_token="new", token_type="Bearer"
+        )
+
+        rebuilt = builder.build(session)
+        assert rebuilt.headers["authorization"] == "Bearer new"
+
+    def test_only_parses_just_those_fields(self):
+        album = AlbumFactory().build(id=1, title="title")
+        builder = RequestBuilder.from_model(Album, RequestFactory().build())
+        response = ResponseFactory().build(
+            data=album.model_dump_json(by_alias=True).encode()
+        )
+
+        parsed = builder.only("id", "title").parse(response)
+
+        assert parsed.model_dump() == {"id": 1, "title": "title"}
+
+    def test_only_needs_a_model(self):
+        builder = RequestBuilder(bytes, RequestFactory().build())
+
+        with pytest.raises(TypeError):
+            builder.only("id")
+
     def test_parse_defers_to_model_when_built_with_model(self, mocker):
         model = mocker.Mock(spec=BaseModel)
         response = ResponseFactory().build(data=b"foo bar")
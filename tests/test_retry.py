@@ -0,0 +1,65 @@
+from pytest_cases import parametrize
+
+from littoral.retry import RetryBudget, RetryPolicy
+
+
+@parametrize(
+    "method, status_code, expected",
+    [
+        ("GET", 503, True),
+        ("GET", None, True),
+        ("GET", 400, False),
+        ("POST", 503, False),
+        ("POST", None, False),
+        ("POST", 429, True),
+    ],
+)
+def test_retries_transient_failures_of_idempotent_requests(
+    method, status_code, expected
+):
+    policy = RetryPolicy(budget=None)
+
+    assert policy.should_retry(method, 0, status_code) is expected
+
+
+def test_stops_after_max_attempts():
+    policy = RetryPolicy(max_attempts=3, budget=None)
+
+    assert policy.should_retry("GET", 1, 503)
+    assert not policy.should_retry("GET", 2, 503)
+
+
+def test_errors_without_response_can_be_excluded():
+    policy = RetryPolicy(retry_errors=False, budget=None)
+
+    assert not policy.should_retry("GET", 0)
+
+
+def test_backoff_grows_exponentially_to_cap():
+    policy = RetryPolicy(base_delay=1, multiplier=2, max_delay=5, jitter=False)
+
+    assert [policy.backoff(attempt) for attempt in range(4)] == [1, 2, 4, 5]
+
+
+def test_backoff_jitter_scales_delay():
+    policy = RetryPolicy(base_delay=1, multiplier=2, random=lambda: 0.25)
+
+    assert policy.backoff(2) == 1
+
+
+def test_budget_earned_by_requests_and_spent_by_retries():
+    budget = RetryBudget(ratio=0.5, max_tokens=1)
+
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+
+
+def test_budget_caps_retries_across_requests():
+    policy = RetryPolicy(budget=RetryBudget(ratio=0, max_tokens=1))
+
+    assert policy.should_retry("GET", 0, 503)
+    assert not policy.should_retry("GET", 0, 503)
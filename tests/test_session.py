@@ -1,6 +1,8 @@
 # ruff: noqa: E501
 from datetime import datetime, timedelta
 
+import pytest
+from pydantic import ValidationError
 from pytest_cases import parametrize_with_cases
 
 from littoral.auth.models import (
@@ -58,6 +60,11 @@ class TestAccessToken:
         fake = AccessTokenFactory().build(expires_in=freeze_time)
         assert fake.is_expired()
 
+    def test_refresh_in_is_margin_before_expiry(self, freeze_time: datetime):
+        fake = AccessTokenFactory().build(expires_in=freeze_time + timedelta(hours=1))
+
+        assert fake.refresh_in(timedelta(minutes=5)) == timedelta(minutes=55)
+
 
 class TestRefreshToken:
     def test_factory_generates_fake(self):
@@ -116,3 +123,61 @@ class TestApiSession:
 
         assert builder is mocker.sentinel.builder
         access_token.assert_called_once_with(api_session.client_config)
+
+    def test_shared_headers_recomputed_when_token_replaced(self):
+        api_session = ApiSessionFactory().build()
+        headers = api_session.shared_headers()
+        assert api_session.shared_headers() is headers
+
+        api_session.access_token = AccessTokenFactory.build(
+            access_token="new", token_type="Bearer"
+        )
+
+        assert api_session.shared_headers() == {"authorization": "Bearer new"}
+
+    def test_shared_headers_follow_token_changed_in_place(self):
+        api_session = ApiSessionFactory().build()
+        api_session.shared_headers()
+
+        api_session.access_token.token_type = "Bearer"
+        api_session.access_token.access_token = "new"
+
+        assert api_session.shared_headers() == {"authorization": "Bearer new"}
+
+    def test_session_cannot_change_in_place(self):
+        api_session = ApiSessionFactory().build()
+        api_session.shared_params()
+
+        with pytest.raises(ValidationError):
+            api_session.session.id = "new"
+
+    def test_equal_tokens_share_headers(self):
+        api_session = ApiSessionFactory().build()
+        copy = api_session.model_copy(deep=True)
+
+        assert copy.shared_headers() is api_session.shared_headers()
+        assert copy.shared_params() is api_session.shared_params()
+
+    def test_derived_values_do_not_affect_equality(self):
+        api_session = ApiSessionFactory().build()
+        copy = api_session.model_copy(deep=True)
+
+        api_session.params()
+        api_session.headers()
+
+        assert api_session == copy
+        assert api_session.__dict__.keys() == ApiSession.model_fields.keys()
+
+    def test_copies_derive_their_own_values(self):
+        api_session = ApiSessionFactory().build()
+        headers = api_session.shared_headers()
+        copy = api_session.model_copy(
+            update={
+                "access_token": AccessTokenFactory.build(
+                    access_token="new", token_type="Bearer"
+                )
+            }
+        )
+
+        assert copy.shared_headers() == {"authorization": "Bearer new"}
+        assert api_session.shared_headers() is headers
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from littoral.singleflight import AsyncSingleFlight, SingleFlight
+from tests.conftest import wait_until
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_with_same_key_share_one_call(self):
+        single_flight = SingleFlight()
+        release = threading.Event()
+        calls = 0
+
+        def fn() -> int:
+            nonlocal calls
+            calls += 1
+            release.wait()
+            return 42
+
+        with ThreadPoolExecutor(5) as pool:
+            futures = [pool.submit(single_flight.do, "key", fn) for _ in range(5)]
+            wait_until(lambda: single_flight.stats.calls >= 5)
+            release.set()
+            results = [future.result() for future in futures]
+
+        assert results == [42] * 5
+        assert calls == 1
+        assert single_flight.stats.coalesced == 4
+
+    def test_exceptions_shared_with_waiters(self):
+        single_flight = SingleFlight()
+        release = threading.Event()
+
+        def fn() -> int:
+            release.wait()
+            raise ValueError
+
+        with ThreadPoolExecutor(2) as pool:
+            futures = [pool.submit(single_flight.do, "key", fn) for _ in range(2)]
+            wait_until(lambda: single_flight.stats.calls >= 2)
+            release.set()
+
+            for future in futures:
+                with pytest.raises(ValueError):
+                    future.result()
+
+    def test_sequential_calls_not_coalesced(self):
+        single_flight = SingleFlight()
+
+        assert single_flight.do("key", lambda: 1) == 1
+        assert single_flight.do("key", lambda: 2) == 2
+        assert single_flight.stats.coalesced == 0
+
+
+class TestAsyncSingleFlight:
+    def test_concurrent_calls_with_same_key_share_one_call(self):
+        single_flight = AsyncSingleFlight()
+        calls = 0
+
+        async def fn() -> int:
+            nonlocal calls
+            calls += 1
+            call = calls
+            await asyncio.sleep(0.01)
+            return call
+
+        async def run() -> list[int]:
+            return await asyncio.gather(
+                *(single_flight.do(key, fn) for key in ["a", "a", "a", "b"])
+            )
+
+        assert asyncio.run(run()) == [1, 1, 1, 2]
+        assert single_flight.stats.coalesced == 2
+
+    def test_cancelling_a_waiter_does_not_cancel_the_call(self):
+        single_flight = AsyncSingleFlight()
+
+        async def fn() -> int:
+            await asyncio.sleep(0.01)
+            return 42
+
+        async def run() -> int:
+            first = asyncio.create_task(single_flight.do("key", fn))
+            second = asyncio.create_task(single_flight.do("key", fn))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(run()) == 42
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+from pytest_cases import parametrize
+
+from littoral.streaming import ItemScanner, ItemsParser
+
+DOCUMENT = {
+    "limit": 5,
+    "nested": {"items": ["not", "these"]},
+    "items": [
+        {"name": 'tricky ,]}" \\ "', "tags": [1, {"a": []}]},
+        2,
+        "three",
+        None,
+        [4, 5],
+    ],
+    "totalNumberOfItems": 5,
+}
+
+
+def scan(raw: bytes, size: int, key: str | None = "items") -> list[bytes]:
+    scanner = ItemScanner(key)
+    items = []
+    for start in range(0, len(raw), size):
+        items.extend(scanner.feed(raw[start : start + size]))
+    scanner.close()
+    return items
+
+
+@parametrize("size", [1, 2, 7, 64, 10_000])
+def test_finds_items_however_document_is_chunked(size):
+    raw = json.dumps(DOCUMENT).encode()
+
+    items = scan(raw, size)
+
+    assert [json.loads(item) for item in items] == DOCUMENT["items"]
+
+
+def test_scans_top_level_array_without_key():
+    assert scan(b'[1, {"a": [2]} , "3"]', 3, key=None) == [b"1", b'{"a": [2]}', b'"3"']
+
+
+def test_empty_array_has_no_items():
+    assert scan(b'{"items": []}', 1) == []
+
+
+def test_items_returned_as_soon_as_complete():
+    scanner = ItemScanner()
+
+    assert scanner.feed(b'{"items": [{"id": 1}, {"id"') == [b'{"id": 1}']
+    assert scanner.feed(b": 2}]}") == [b'{"id": 2}']
+
+
+def test_incomplete_array_raises_on_close():
+    scanner = ItemScanner()
+    scanner.feed(b'{"items": [1, 2')
+
+    with pytest.raises(ValueError):
+        scanner.close()
+
+
+def test_parser_parses_each_item():
+    parser = ItemsParser(json.loads)
+
+    assert parser(json.dumps(DOCUMENT).encode()) == DOCUMENT["items"]
@@ -0,0 +1,165 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Any
+
+import httpx
+import pytest
+from pydantic import BaseModel
+from pytest_cases import parametrize, parametrize_with_cases
+
+from littoral import aio
+from littoral.auth.client_oauth2 import SimpleOauthFlow
+from littoral.auth.models import AccessToken
+from littoral.models import Album, Artist, Track, Video
+from littoral.paging import Page
+from littoral.parsers import parser
+from littoral.request import RequestBuilder
+from littoral.sync import HttpSession, Session
+from littoral.testing import AlbumFactory, ArtistFactory, RequestFactory
+from tests.cases_album import AlbumCase, case_all_data, case_picture_null
+from tests.cases_artist import ArtistCase
+from tests.http import (
+    TOKEN_URL,
+    api_session,
+    artist_builder,
+    artist_json,
+    stateless_artist_builder,
+    token_json,
+    tracks_page,
+)
+
+msgspec = pytest.importorskip("msgspec")
+
+from littoral.structs import StructDecoder  # noqa: E402
+
+
+def plain(value: Any) -> Any:
+    """Structs and models as dicts, to compare."""
+    if isinstance(value, msgspec.Struct):
+        return {k: plain(v) for k, v in msgspec.structs.asdict(value).items()}
+    if isinstance(value, BaseModel):
+        return {k: plain(v) for k, v in value.__dict__.items()}
+    if isinstance(value, list):
+        return [plain(v) for v in value]
+    return value
+
+
+def conforms(type_: Any, raw: bytes) -> None:
+    struct = StructDecoder().parser(parser(type_))(raw)
+
+    assert not isinstance(struct, BaseModel)
+    assert plain(struct) == plain(parser(type_)(raw))
+
+
+@parametrize_with_cases("case", cases=".cases_album")
+def test_album_struct_conforms(case: AlbumCase):
+    conforms(Album, case.raw)
+
+
+@parametrize_with_cases("case", cases=".cases_artist")
+def test_artist_struct_conforms(case: ArtistCase):
+    conforms(Artist, case.raw)
+
+
+def test_list_of_albums_conforms():
+    conforms(
+        list[Album],
+        b"["
+        + b",".join(case().raw for case in [case_all_data, case_picture_null])
+        + b"]",
+    )
+
+
+def test_fields_still_validated():
+    raw = ArtistFactory().build(id=1).model_dump_json(by_alias=True)
+
+    with pytest.raises(msgspec.ValidationError):
+        StructDecoder().parser(parser(Artist))(raw.replace('"id":1', '"id":-1'))
+
+
+@parametrize("type_", [AccessToken, SimpleOauthFlow, Page[Track], Track | Video])
+def test_types_other_than_resources_parsed_by_pydantic(type_):
+    model_parser = parser(type_)
+
+    assert StructDecoder().parser(model_parser) == model_parser
+
+
+def test_parsers_of_unknown_types_kept():
+    builder = RequestBuilder(bytes, RequestFactory().build())
+
+    assert StructDecoder().parser(builder.parser) is bytes
+
+
+def test_session_decodes_into_structs():
+    http_session = HttpSession(
+        client=httpx.Client(
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, content=artist_json(request))
+            )
+        ),
+        decoder=StructDecoder(),
+    )
+
+    artist = http_session.send(stateless_artist_builder(3))
+
+    assert isinstance(artist, msgspec.Struct)
+    assert artist.id == 3
+
+
+def make_session(handler, expires_at: datetime | None = None) -> Session:
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    return Session(
+        api_session(expires_at), HttpSession(client=client, decoder=StructDecoder())
+    )
+
+
+def test_session_paginates_with_structs_on():
+    album = AlbumFactory().build(id=1)
+
+    with make_session(
+        lambda request: httpx.Response(200, content=tracks_page(request, 25))
+    ) as session:
+        tracks = list(session.paginate(album.tracks, 10))
+
+    assert [track.id for track in tracks] == list(range(25))
+    # Pages are parsed by pydantic, to be walked.
+    assert all(isinstance(track, Track) for track in tracks)
+
+
+def test_session_refreshes_tokens_with_structs_on():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if str(request.url) == TOKEN_URL:
+            return httpx.Response(200, content=token_json("new"))
+        return httpx.Response(200, content=artist_json(request))
+
+    with make_session(handler, datetime.now(timezone.utc)) as session:
+        artist = session.send(artist_builder(1))
+
+        assert isinstance(session.api_session.access_token, AccessToken)
+        assert session.api_session.access_token.access_token == "new"
+    assert artist.id == 1
+
+
+def test_async_session_paginates_and_refreshes_with_structs_on():
+    album = AlbumFactory().build(id=1)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if str(request.url) == TOKEN_URL:
+            return httpx.Response(200, content=token_json("new"))
+        return httpx.Response(200, content=tracks_page(request, 25))
+
+    session = aio.Session(
+        api_session(datetime.now(timezone.utc)),
+        aio.HttpSession(
+            client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+            decoder=StructDecoder(),
+        ),
+    )
+
+    async def collect() -> list:
+        return [track async for track in session.paginate(album.tracks, 10)]
+
+    tracks = asyncio.run(collect())
+
+    assert [track.id for track in tracks] == list(range(25))
+    assert session.api_session.access_token.access_token == "new"
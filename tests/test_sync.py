@@ -0,0 +1,729 @@
+import fcntl
+import io
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from littoral.auth.models import AccessToken
+from littoral.auth.store import TokenStore
+from littoral.cache import DiskCache, MemoryCache, ParseMemo
+from littoral.circuit import CircuitBreaker, CircuitOpen
+from littoral.deadline import DeadlineExceeded
+from littoral.hedging import HedgingPolicy
+from littoral.ratelimit import RateLimiter
+from littoral.request import Request, StatelessRequestBuilder
+from littoral.retry import RetryBudget, RetryPolicy
+from littoral.singleflight import SingleFlight
+from littoral.sync import HttpSession, Session
+from littoral.testing import AlbumFactory
+from tests.conftest import wait_until
+from tests.http import (
+    TOKEN_URL,
+    api_session,
+    artist_builder,
+    artist_json,
+    stateless_artist_builder,
+    token_json,
+    tracks_page,
+)
+
+
+def make_session(handler, expires_at: datetime | None = None, **kwargs) -> Session:
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    return Session(api_session(expires_at), HttpSession(client=client), **kwargs)
+
+
+def slow_artists(delays: dict[int, float]):
+    def handler(request: httpx.Request) -> httpx.Response:
+        id = int(request.url.path.rsplit("/", 1)[-1])
+        time.sleep(delays.get(id, 0))
+        return httpx.Response(200, content=artist_json(request))
+
+    return handler
+
+
+class TestHttpSession:
+    def test_404_raises_key_error(self):
+        http_session = HttpSession(
+            client=httpx.Client(
+                transport=httpx.MockTransport(lambda _: httpx.Response(404))
+            )
+        )
+
+        with pytest.raises(KeyError):
+            http_session.send(stateless_artist_builder(1))
+
+    def test_disk_cache_revalidates_stored_responses(self, tmp_path):
+        conditions = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            conditions.append(request.headers.get("if-none-match"))
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304)
+            return httpx.Response(
+                200, headers={"ETag": '"v1"'}, content=artist_json(request)
+            )
+
+        def http_session() -> HttpSession:
+            return HttpSession(
+                client=httpx.Client(transport=httpx.MockTransport(handler)),
+                disk_cache=DiskCache(tmp_path / "cache.db"),
+            )
+
+        first = http_session().send(stateless_artist_builder(1))
+        second = http_session().send(stateless_artist_builder(1))
+
+        assert first == second
+        assert conditions == [None, '"v1"']
+
+    def test_too_many_requests_retried_after_delay(self):
+        responses = iter(
+            [
+                httpx.Response(429, headers={"Retry-After": "0"}),
+                httpx.Response(200, content=artist_json(httpx.Request("GET", "/1"))),
+            ]
+        )
+        limiter = RateLimiter()
+        http_session = HttpSession(
+            client=httpx.Client(
+                transport=httpx.MockTransport(lambda _: next(responses))
+            ),
+            rate_limiter=limiter,
+        )
+
+        assert http_session.send(stateless_artist_builder(1)).id == 1
+        assert limiter.rate("api.tidal.com") < limiter.initial_rate
+
+    def test_too_many_requests_raised_after_max_attempts(self):
+        http_session = HttpSession(
+            client=httpx.Client(
+                transport=httpx.MockTransport(
+                    lambda request: httpx.Response(
+                        429, headers={"Retry-After": "0"}, request=request
+                    )
+                )
+            ),
+            retry=RetryPolicy(max_attempts=2, base_delay=0),
+        )
+
+        with pytest.raises(httpx.HTTPStatusError):
+            http_session.send(stateless_artist_builder(1))
+
+    def test_slow_get_hedged_with_duplicate(self):
+        calls = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                time.sleep(0.5)
+            return httpx.Response(200, content=artist_json(request))
+
+        hedging = HedgingPolicy(initial_delay=0.01, budget=1)
+        http_session = HttpSession(
+            client=httpx.Client(transport=httpx.MockTransport(handler)),
+            hedging=hedging,
+        )
+
+        start = time.monotonic()
+        artist = http_session.send(stateless_artist_builder(1))
+
+        assert artist.id == 1
+        assert time.monotonic() - start < 0.5
+        assert hedging.hedges == 1
+
+    def test_unhedgeable_get_sent_from_calling_thread(self):
+        threads = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            threads.append(threading.current_thread())
+            return httpx.Response(200, content=artist_json(request))
+
+        http_session = HttpSession(
+            client=httpx.Client(transport=httpx.MockTransport(handler)),
+            hedging=HedgingPolicy(budget=0),
+        )
+
+        http_session.send(stateless_artist_builder(1))
+
+        assert threads == [threading.current_thread()]
+
+    def test_queued_get_not_hedged(self):
+        hedging = HedgingPolicy(initial_delay=0.01, budget=1)
+        http_session = HttpSession(
+            client=httpx.Client(
+                transport=httpx.MockTransport(
+                    lambda request: httpx.Response(200, content=artist_json(request))
+                )
+            ),
+            hedging=hedging,
+        )
+        pool = http_session.__dict__["_hedge_pool"] = ThreadPoolExecutor(1)
+        pool.submit(time.sleep, 0.1)
+
+        artist = http_session.send(stateless_artist_builder(1))
+
+        assert artist.id == 1
+        assert hedging.hedges == 0
+        http_session.close()
+
+    def test_close_shuts_down_hedging_threads(self):
+        hedging = HedgingPolicy(initial_delay=0.01, budget=1)
+        session = make_session(
+            lambda request: httpx.Response(200, content=artist_json(request))
+        )
+        session.http_session.hedging = hedging
+        session.send(artist_builder(1))
+        pool = session.http_session._hedge_pool
+
+        session.close()
+
+        with pytest.raises(RuntimeError):
+            pool.submit(print)
+
+    def test_open_circuit_fails_fast(self):
+        calls = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal calls
+            calls += 1
+            return httpx.Response(503, request=request)
+
+        http_session = HttpSession(
+            client=httpx.Client(transport=httpx.MockTransport(handler)),
+            circuit_breaker=CircuitBreaker(min_requests=2),
+            retry=RetryPolicy(max_attempts=1),
+        )
+        for _ in range(2):
+            with pytest.raises(httpx.HTTPStatusError):
+                http_session.send(stateless_artist_builder(1))
+
+        with pytest.raises(CircuitOpen):
+            http_session.send(stateless_artist_builder(1))
+        assert calls == 2
+
+    def test_open_circuit_serves_stale_from_disk_cache(self, tmp_path):
+        healthy = True
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if healthy and "if-none-match" not in request.headers:
+                return httpx.Response(
+                    200, headers={"ETag": '"v1"'}, content=artist_json(request)
+                )
+            return httpx.Response(503, request=request)
+
+        http_session = HttpSession(
+            client=httpx.Client(transport=httpx.MockTransport(handler)),
+            disk_cache=DiskCache(tmp_path / "cache.db"),
+            circuit_breaker=CircuitBreaker(min_requests=1),
+            retry=RetryPolicy(max_attempts=1),
+        )
+        first = http_session.send(stateless_artist_builder(1))
+        healthy = False
+        with pytest.raises(httpx.HTTPStatusError):
+            http_session.send(stateless_artist_builder(2))
+
+        assert http_session.send(stateless_artist_builder(1)) == first
+
+    def test_transient_failures_retried(self):
+        responses = iter(
+            [
+                httpx.ConnectError("reset"),
+                httpx.Response(503),
+                httpx.Response(200, content=artist_json(httpx.Request("GET", "/1"))),
+            ]
+        )
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            response = next(responses)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        http_session = HttpSession(
+            client=httpx.Client(transport=httpx.MockTransport(handler)),
+            retry=RetryPolicy(base_delay=0),
+        )
+
+        assert http_session.send(stateless_artist_builder(1)).id == 1
+
+    def test_non_idempotent_requests_not_retried(self):
+        calls = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal calls
+            calls += 1
+            return httpx.Response(503, request=request)
+
+        http_session = HttpSession(
+            client=httpx.Client(transport=httpx.MockTransport(handler)),
+            retry=RetryPolicy(base_delay=0),
+        )
+        builder = StatelessRequestBuilder.from_model(
+            AccessToken,
+            Request(method="POST", url=TOKEN_URL),  # type: ignore
+        )
+
+        with pytest.raises(httpx.HTTPStatusError):
+            http_session.send(builder)
+        assert calls == 1
+
+    def test_retries_stop_when_budget_exhausted(self):
+        calls = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal calls
+            calls += 1
+            return httpx.Response(503, request=request)
+
+        http_session = HttpSession(
+            client=httpx.Client(transport=httpx.MockTransport(handler)),
+            retry=RetryPolicy(base_delay=0, budget=RetryBudget(ratio=0, max_tokens=2)),
+        )
+        for _ in range(3):
+            with pytest.raises(httpx.HTTPStatusError):
+                http_session.send(stateless_artist_builder(1))
+
+        assert calls == 5
+
+    def test_download_streams_body_into_file(self):
+        chunks = [b"a" * 1000, b"b" * 1000, b"c"]
+        responses = iter(
+            [httpx.Response(503), httpx.Response(200, content=iter(chunks))]
+        )
+        http_session = HttpSession(
+            client=httpx.Client(
+                transport=httpx.MockTransport(lambda _: next(responses))
+            ),
+            retry=RetryPolicy(base_delay=0),
+        )
+        file = io.BytesIO()
+
+        written = http_session.download(stateless_artist_builder(1).build(), file)
+
+        assert written == 2001
+        assert file.getvalue() == b"".join(chunks)
+
+
+class TestSession:
+    def test_send_parses_response(self):
+        session = make_session(
+            lambda request: httpx.Response(200, content=artist_json(request))
+        )
+
+        assert session.send(artist_builder(3)).id == 3
+
+    def test_submit_returns_future(self):
+        with make_session(slow_artists({})) as session:
+            future = session.submit(artist_builder(4))
+
+            assert future.result().id == 4
+
+    def test_map_returns_results_in_order(self):
+        with make_session(slow_artists({0: 0.05})) as session:
+            artists = session.map(artist_builder(i) for i in range(10))
+
+            assert [artist.id for artist in artists] == list(range(10))
+
+    def test_map_overlaps_requests(self):
+        with make_session(slow_artists({i: 0.05 for i in range(8)})) as session:
+            start = time.monotonic()
+            list(session.map(artist_builder(i) for i in range(8)))
+
+            assert time.monotonic() - start < 0.05 * 4
+
+    def test_as_completed_yields_fastest_first(self):
+        with make_session(slow_artists({0: 0.1})) as session:
+            results = list(session.as_completed(artist_builder(i) for i in range(3)))
+
+            assert results[-1][1].id == 0
+            assert sorted(artist.id for _, artist in results) == [0, 1, 2]
+
+    def test_pool_bounded_by_max_workers(self):
+        in_flight = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.01)
+            with lock:
+                in_flight -= 1
+            return httpx.Response(200, content=artist_json(request))
+
+        with make_session(handler, max_workers=2) as session:
+            list(session.map(artist_builder(i) for i in range(10)))
+
+        assert peak == 2
+
+    def test_expired_token_refreshed_once_for_concurrent_requests(self):
+        refreshes = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal refreshes
+            if str(request.url) == TOKEN_URL:
+                refreshes += 1
+                time.sleep(0.01)
+                return httpx.Response(200, content=token_json("new"))
+            assert request.headers["authorization"] == "Bearer new"
+            return httpx.Response(200, content=artist_json(request))
+
+        with make_session(handler, expires_at=datetime.now(timezone.utc)) as session:
+            list(session.map(artist_builder(i) for i in range(10)))
+
+        assert refreshes == 1
+
+    def test_unauthorised_response_refreshes_and_resends(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            if str(request.url) == TOKEN_URL:
+                return httpx.Response(200, content=token_json("new"))
+            if request.headers["authorization"] == "Bearer old":
+                return httpx.Response(401, request=request)
+            return httpx.Response(200, content=artist_json(request))
+
+        session = make_session(handler)
+
+        assert session.send(artist_builder(7)).id == 7
+        assert session.api_session.access_token.access_token == "new"
+
+    def test_paginate_walks_every_page(self):
+        album = AlbumFactory().build(id=1)
+        offsets = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            offsets.append(int(request.url.params["offset"]))
+            return httpx.Response(200, content=tracks_page(request, 25))
+
+        with make_session(handler) as session:
+            tracks = list(session.paginate(album.tracks, page_size=10))
+
+        assert [track.id for track in tracks] == list(range(25))
+        assert offsets == [0, 10, 20]
+
+    def test_paginate_prefetches_next_page(self):
+        album = AlbumFactory().build(id=1)
+        fetched = threading.Event()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.params["offset"] == "10":
+                fetched.set()
+            return httpx.Response(200, content=tracks_page(request, 20))
+
+        with make_session(handler) as session:
+            tracks = session.paginate(album.tracks, page_size=10)
+            next(tracks)
+
+            assert fetched.wait(1)
+
+    def test_paginate_cancels_pages_not_yet_sent_when_abandoned(self):
+        album = AlbumFactory().build(id=1)
+        offsets = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            offsets.append(int(request.url.params["offset"]))
+            if offsets[-1]:
+                time.sleep(0.05)
+            return httpx.Response(200, content=tracks_page(request, 100))
+
+        with make_session(handler, max_workers=1) as session:
+            tracks = session.paginate(album.tracks, 10, max_concurrency=4)
+            next(tracks)
+            tracks.close()
+
+        assert offsets == [0, 10]
+
+    def test_paginate_follows_pages_capped_below_limit(self):
+        album = AlbumFactory().build(id=1)
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            # Echoes the limit asked for, but never sends more than 4 items.
+            offset = int(request.url.params["offset"])
+            items = [{"id": i} for i in range(offset, min(offset + 4, 12))]
+            return httpx.Response(
+                200,
+                content=json.dumps(
+                    {
+                        "limit": int(request.url.params["limit"]),
+                        "offset": offset,
+                        "totalNumberOfItems": 12,
+                        "items": items,
+                    }
+                ).encode(),
+            )
+
+        with make_session(handler) as session:
+            tracks = session.paginate(album.tracks, 10, max_concurrency=2)
+
+            assert [track.id for track in tracks] == list(range(12))
+
+    def test_paginate_fans_out_once_total_known(self):
+        album = AlbumFactory().build(id=1)
+        in_flight = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.02)
+            with lock:
+                in_flight -= 1
+            return httpx.Response(200, content=tracks_page(request, 100))
+
+        with make_session(handler) as session:
+            tracks = session.paginate(album.tracks, 10, max_concurrency=4)
+
+            assert [track.id for track in tracks] == list(range(100))
+
+        assert peak == 4
+
+    def test_paginate_needs_some_concurrency(self):
+        album = AlbumFactory().build(id=1)
+        session = make_session(lambda _: pytest.fail("nothing should be sent"))
+
+        with pytest.raises(ValueError, match="max_concurrency"):
+            next(session.paginate(album.tracks, 10, max_concurrency=0))
+
+    def test_cached_responses_not_refetched(self):
+        calls = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal calls
+            calls += 1
+            return httpx.Response(200, content=artist_json(request))
+
+        session = make_session(handler)
+        session.http_session.cache = MemoryCache()
+
+        first = session.send(artist_builder(1))
+        second = session.send(artist_builder(1))
+
+        assert first is second
+        assert calls == 1
+        assert session.http_session.cache.stats.hits == 1
+
+    def test_identical_responses_share_one_parse(self):
+        # Every artist looked up comes back the same.
+        artist = httpx.Request("GET", "https://api.tidal.com/v1/artists/1")
+        session = make_session(
+            lambda _: httpx.Response(200, content=artist_json(artist))
+        )
+        session.http_session.parse_memo = ParseMemo()
+
+        first = session.send(artist_builder(1))
+        second = session.send(artist_builder(2))
+
+        assert first is second
+        assert session.http_session.parse_memo.stats.hits == 1
+
+    def test_single_flight_coalesces_concurrent_identical_requests(self):
+        calls = 0
+        release = threading.Event()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal calls
+            calls += 1
+            release.wait()
+            return httpx.Response(200, content=artist_json(request))
+
+        with make_session(handler) as session:
+            session.http_session.single_flight = single_flight = SingleFlight()
+            futures = [session.submit(artist_builder(1)) for _ in range(4)]
+            wait_until(lambda: single_flight.stats.calls >= 4)
+            release.set()
+
+            assert {future.result().id for future in futures} == {1}
+
+        assert calls == 1
+        assert single_flight.stats.coalesced == 3
+
+    def test_tokens_shorter_than_margin_not_refreshed_straight_away(self):
+        refreshes = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal refreshes
+            if str(request.url) == TOKEN_URL:
+                refreshes += 1
+                return httpx.Response(200, content=token_json("new", expires_in=60))
+            return httpx.Response(200, content=artist_json(request))
+
+        with make_session(handler, datetime.now(timezone.utc)) as session:
+            session.send(artist_builder(1))
+            time.sleep(0.2)
+
+        assert refreshes == 1
+
+    def test_token_refreshed_in_background_before_expiry(self):
+        refreshed = threading.Event()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if str(request.url) == TOKEN_URL:
+                refreshed.set()
+                return httpx.Response(200, content=token_json("new"))
+            assert request.headers["authorization"] == "Bearer new"
+            return httpx.Response(200, content=artist_json(request))
+
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=5, seconds=0.05)
+        with make_session(handler, expires_at) as session:
+            assert refreshed.wait(1)
+
+            assert session.send(artist_builder(1)).id == 1
+
+
+class TestDeadlines:
+    def test_retry_after_beyond_deadline_fails_fast(self):
+        calls = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal calls
+            calls += 1
+            return httpx.Response(429, headers={"Retry-After": "30"})
+
+        session = make_session(handler, timeout=1)
+
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            session.send(artist_builder(1))
+
+        assert time.monotonic() - start < 0.5
+        assert calls == 1
+
+    def test_budget_shared_across_refresh_and_request(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            time.sleep(0.1)
+            if str(request.url) == TOKEN_URL:
+                return httpx.Response(200, content=token_json("new"))
+            return httpx.Response(429, headers={"Retry-After": "0.05"})
+
+        session = make_session(
+            handler, expires_at=datetime.now(timezone.utc), timeout=0.15
+        )
+
+        with pytest.raises(DeadlineExceeded):
+            session.send(artist_builder(1))
+
+    def test_coalesced_caller_out_of_time_gets_deadline_exceeded(self):
+        release = threading.Event()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            release.wait()
+            return httpx.Response(200, content=artist_json(request))
+
+        with make_session(handler) as session:
+            session.http_session.single_flight = single_flight = SingleFlight()
+            leader = session.submit(artist_builder(1))
+            wait_until(lambda: single_flight.stats.calls >= 1)
+
+            with pytest.raises(DeadlineExceeded):
+                session.send(artist_builder(1), timeout=0.05)
+            release.set()
+
+            assert leader.result().id == 1
+
+    def test_caller_deadlines_do_not_open_circuit(self):
+        calls = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal calls
+            calls += 1
+            # Like a real transport, give up once the clipped read timeout passes.
+            time.sleep(request.extensions["timeout"]["read"])
+            raise httpx.ReadTimeout("slow", request=request)
+
+        session = make_session(handler)
+        session.http_session.circuit_breaker = CircuitBreaker(min_requests=2)
+
+        for _ in range(10):
+            with pytest.raises(DeadlineExceeded):
+                session.send(artist_builder(1), timeout=0.01)
+
+        assert calls == 10
+
+    def test_token_store_held_elsewhere_bounded_by_deadline(self, tmp_path):
+        def handler(request: httpx.Request) -> httpx.Response:
+            if str(request.url) == TOKEN_URL:
+                return httpx.Response(200, content=token_json("new"))
+            return httpx.Response(200, content=artist_json(request))
+
+        store = TokenStore(tmp_path / "session.json")
+        session = make_session(
+            handler,
+            expires_at=datetime.now(timezone.utc),
+            timeout=0.1,
+            token_store=store,
+        )
+
+        with open(store.lock_path, "a") as held:
+            fcntl.flock(held, fcntl.LOCK_EX)
+            with pytest.raises(DeadlineExceeded):
+                session.send(artist_builder(1))
+
+        # Background refreshes wait for the lock without a deadline, and then
+        # let go of it.
+        assert store.acquire(timeout=1)
+        store.release()
+        assert session.send(artist_builder(1)).id == 1
+        session.close()
+
+    def test_per_call_timeout_overrides_session_default(self):
+        session = make_session(
+            lambda request: httpx.Response(200, content=artist_json(request)),
+            timeout=0,
+        )
+
+        assert session.send(artist_builder(1), timeout=5).id == 1
+
+    def test_download_authenticates(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            if str(request.url) == TOKEN_URL:
+                return httpx.Response(200, content=token_json("new"))
+            if request.headers["authorization"] == "Bearer old":
+                return httpx.Response(401, request=request)
+            return httpx.Response(200, content=b"image")
+
+        session = make_session(handler)
+        album = AlbumFactory().build()
+        file = io.BytesIO()
+
+        session.download(album.image(), file)
+
+        assert file.getvalue() == b"image"
+
+    def test_stream_deadline_does_not_count_time_spent_on_items(self):
+        album = AlbumFactory().build(id=1)
+        chunks = [b'{"items": [{"id": 0}, ', b'{"id": 1}, ', b'{"id": 2}]}']
+        session = make_session(lambda _: httpx.Response(200, content=iter(chunks)))
+
+        ids = []
+        for track in session.stream(album.tracks(10).streamed(), timeout=0.05):
+            ids.append(track.id)
+            time.sleep(0.05)
+
+        assert ids == [0, 1, 2]
+
+    def test_stream_yields_items_before_download_finishes(self):
+        album = AlbumFactory().build(id=1)
+        sent = []
+
+        def body():
+            for chunk in [b'{"items": [{"id": 0}, ', b'{"id": 1}, ', b'{"id": 2}]}']:
+                sent.append(chunk)
+                yield chunk
+
+        session = make_session(lambda _: httpx.Response(200, content=body()))
+
+        tracks = session.stream(album.tracks(3).streamed())
+
+        assert next(tracks).id == 0
+        assert len(sent) < 3
+        assert [track.id for track in tracks] == [1, 2]
@@ -0,0 +1,92 @@
+import fcntl
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+from littoral.auth.store import TokenStore
+from littoral.sync import HttpSession, Session
+from littoral.testing import AccessTokenFactory
+from tests.http import TOKEN_URL, api_session, artist_builder, artist_json, token_json
+
+
+def test_saved_session_loads_back(tmp_path, compare_models):
+    store = TokenStore(tmp_path / "session.json")
+    saved = api_session()
+
+    store.save(saved)
+
+    compare_models(store.load(), saved)
+    assert [p.name for p in tmp_path.iterdir()] == ["session.json"]
+
+
+class TestFresherToken:
+    def test_none_when_nothing_stored(self, tmp_path):
+        store = TokenStore(tmp_path / "session.json")
+
+        assert store.fresher_token(api_session().access_token, timedelta(0)) is None
+
+    def test_none_when_stored_token_is_the_stale_one(self, tmp_path):
+        store = TokenStore(tmp_path / "session.json")
+        stored = api_session()
+        store.save(stored)
+
+        assert store.fresher_token(stored.access_token, timedelta(0)) is None
+
+    def test_none_when_stored_token_also_due_for_refresh(self, tmp_path):
+        store = TokenStore(tmp_path / "session.json")
+        stored = api_session()
+        store.save(stored)
+        stale = AccessTokenFactory().build(access_token="older")
+
+        assert store.fresher_token(stale, timedelta(hours=2)) is None
+
+    def test_stored_session_when_refreshed_elsewhere(self, tmp_path):
+        store = TokenStore(tmp_path / "session.json")
+        store.save(api_session())
+        stale = AccessTokenFactory().build(access_token="older")
+
+        fresher = store.fresher_token(stale, timedelta(minutes=5))
+
+        assert fresher is not None
+        assert fresher.access_token.access_token == "old"
+
+
+def test_processes_sharing_a_file_refresh_once(tmp_path):
+    file = tmp_path / "session.json"
+    refreshes = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal refreshes
+        if str(request.url) == TOKEN_URL:
+            refreshes += 1
+            return httpx.Response(200, content=token_json(f"new {refreshes}"))
+        return httpx.Response(200, content=artist_json(request))
+
+    def worker() -> Session:
+        store = TokenStore(file)
+        return Session(
+            store.load(),
+            HttpSession(client=httpx.Client(transport=httpx.MockTransport(handler))),
+            token_store=store,
+        )
+
+    TokenStore(file).save(api_session(datetime.now(timezone.utc)))
+    first, second = worker(), worker()
+
+    first.send(artist_builder(1))
+    second.send(artist_builder(1))
+
+    assert refreshes == 1
+    assert second.api_session.access_token.access_token == "new 1"
+    assert TokenStore(file).load().access_token.access_token == "new 1"
+
+
+def test_acquire_gives_up_on_a_lock_held_elsewhere(tmp_path):
+    store = TokenStore(tmp_path / "session.json", poll_interval=0.01)
+
+    with open(store.lock_path, "a") as held:
+        fcntl.flock(held, fcntl.LOCK_EX)
+        assert not store.acquire(timeout=0.05)
+
+    assert store.acquire(timeout=0.05)
+    store.release()